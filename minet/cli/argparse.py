@@ -31,6 +31,7 @@ from pytz.exceptions import UnknownTimeZoneError
 from minet.dates import datetime_from_partial_iso_format
 
 from minet.cli.console import MINET_COLORS
+from minet.cli.constants import DEFAULT_OUTPUT_BUFFER_SIZE
 from minet.cli.exceptions import NotResumableError, InvalidArgumentsError
 from minet.cli.utils import acquire_cross_platform_stdout
 
@@ -490,10 +491,11 @@ class InputAction(Action):
 
 
 class OutputOpener(object):
-    def __init__(self, path, resumer_class=None, resumer_kwargs={}):
+    def __init__(self, path, resumer_class=None, resumer_kwargs={}, buffered=False):
         self.path = path
         self.resumer_class = resumer_class
         self.resumer_kwargs = resumer_kwargs
+        self.buffered = buffered
 
     def open(self, cli_args, resume=False):
         if self.path == "-":
@@ -514,7 +516,16 @@ class OutputOpener(object):
 
         # As per #254: newline='' is necessary for CSV output on windows to avoid
         # outputting extra lines because of a '\r\r\n' end of line...
-        return open(self.path, mode, encoding="utf-8", newline="")
+        # NOTE: a large buffer spares us a write syscall every few rows, but
+        # is only used by commands opting in through `buffered_output`, since
+        # rows can stay in memory for a while and be lost on a hard crash
+        return open(
+            self.path,
+            mode,
+            encoding="utf-8",
+            newline="",
+            buffering=DEFAULT_OUTPUT_BUFFER_SIZE if self.buffered else -1,
+        )
 
 
 class OutputAction(Action):
@@ -524,18 +535,23 @@ class OutputAction(Action):
         dest,
         resumer=None,
         resumer_kwargs={},
+        buffered=False,
         help="Path to the output file. Will consider `-` as stdout. If not given, results will also be printed to stdout.",
         default="-",
         **kwargs,
     ):
         self.resumer = resumer
         self.resumer_kwargs = resumer_kwargs
+        self.buffered = buffered
         super().__init__(
             option_strings,
             dest,
             help=help,
             default=OutputOpener(
-                path=default, resumer_class=resumer, resumer_kwargs=resumer_kwargs
+                path=default,
+                resumer_class=resumer,
+                resumer_kwargs=resumer_kwargs,
+                buffered=buffered,
             ),
             **kwargs,
         )
@@ -545,6 +561,7 @@ class OutputAction(Action):
             path=value,
             resumer_class=self.resumer,
             resumer_kwargs=self.resumer_kwargs,
+            buffered=self.buffered,
         )
         setattr(cli_args, self.dest, opener)
 
@@ -724,6 +741,7 @@ def resolve_typical_arguments(
     package: str,
     args,
     no_output=False,
+    buffered_output=False,
     resumer=None,
     resumer_epilog: Optional[str] = None,
     resumer_kwargs=None,
@@ -870,6 +888,9 @@ def resolve_typical_arguments(
         if resumer_kwargs is not None:
             output_argument["resumer_kwargs"] = resumer_kwargs
 
+    if buffered_output:
+        output_argument["buffered"] = True
+
     if not no_output:
         args.append(output_argument)
 
@@ -894,6 +915,7 @@ def command(
     resumer_epilog: Optional[str] = None,
     resumer_kwargs: Optional[Dict[str, Any]] = None,
     no_output: bool = False,
+    buffered_output: bool = False,
     select: bool = False,
     total: bool = False,
     variadic_input: Optional[VariadicInputDefinition] = None,
@@ -936,6 +958,7 @@ def command(
             package,
             arguments,
             no_output=no_output,
+            buffered_output=buffered_output,
             resumer=resumer,
             resumer_epilog=resumer_epilog,
             resumer_kwargs=resumer_kwargs,
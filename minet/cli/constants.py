@@ -7,3 +7,4 @@
 DEFAULT_CONTENT_FOLDER = "downloaded"
 DEFAULT_SCREENSHOT_FOLDER = "screenshots"
 DEFAULT_PREBUFFER_BYTES = 3_000_000  # 3mb
+DEFAULT_OUTPUT_BUFFER_SIZE = 1 << 20  # 1mb
@@ -92,6 +92,7 @@ EXTRACT_COMMAND = command(
     resolve=resolve_arguments,
     variadic_input={"dummy_column": "path", "optional": True, "no_help": True},
     resumer=IndexedResumer,
+    buffered_output=True,
     arguments=[
         {
             "flags": ["-g", "--glob"],
@@ -109,9 +110,8 @@ EXTRACT_COMMAND = command(
         },
         {
             "flags": ["--chunk-size"],
-            "help": "Chunk size for multiprocessing.",
+            "help": "Chunk size for multiprocessing. If not given, will be inferred from the total number of files to process and the number of processes.",
             "type": int,
-            "default": 1,
         },
         {
             "flag": "--body-column",
@@ -142,6 +142,11 @@ EXTRACT_COMMAND = command(
             "flag": "--encoding",
             "help": "Name of the default encoding to use. If not given the command will infer it for you.",
         },
+        {
+            "flag": "--fast",
+            "help": "Whether to skip trafilatura's fallback extraction algorithms (readability & justext). Faster, but can be less precise.",
+            "action": "store_true",
+        },
         {
             "flags": ["-u", "--unordered"],
             "help": "Whether to allow the result to be written in an arbitrary order dependent on the multiprocessing scheduling. Can improve performance.",
@@ -14,7 +14,7 @@ from threading import Lock
 
 from minet.exceptions import TrafilaturaError
 from minet.extraction import extract, TrafilaturaResult
-from minet.multiprocessing import LazyPool
+from minet.multiprocessing import LazyPool, infer_chunksize
 from minet.serialization import serialize_error_as_slug
 from minet.fs import read_potentially_gzipped_path
 from minet.cli.utils import (
@@ -32,6 +32,7 @@ class ExtractWorkerPayload:
     encoding: Optional[str]
     path: Optional[str]
     text: Optional[str]
+    fast: bool = False
 
 
 @dataclass
@@ -58,7 +59,7 @@ def worker(payload: ExtractWorkerPayload) -> ExtractResult:
 
     # Attempting extraction
     try:
-        result.data = extract(text)
+        result.data = extract(text, fast=payload.fast)
     except TrafilaturaError as e:
         result.error = e
         return result
@@ -122,21 +123,33 @@ def action(cli_args, enricher: IndexedEnricher, loading_bar):
                 worked_on[item_id] = item
 
             yield ExtractWorkerPayload(
-                id=item_id, encoding=item.encoding, path=item.path, text=item.text
+                id=item_id,
+                encoding=item.encoding,
+                path=item.path,
+                text=item.text,
+                fast=cli_args.fast,
             )
 
     pool = LazyPool(cli_args.processes)
 
     loading_bar.append_to_title(" (p=%i)" % pool.processes)
 
+    chunk_size = cli_args.chunk_size
+
+    if chunk_size is None:
+        chunk_size = infer_chunksize(
+            enricher.total if not cli_args.glob else None, pool.processes
+        )
+
     warned_about_input_dir = False
 
     with pool:
         for result in pool.imap(
             worker,
             payloads(),
-            chunksize=cli_args.chunk_size,
+            chunksize=chunk_size,
             unordered=cli_args.unordered,
+            max_pending=4 * pool.processes * chunk_size,
         ):
             with loading_bar.step():
                 assert isinstance(result, ExtractResult)
@@ -113,9 +113,7 @@ def get_style_for_status(status: int) -> str:
     return "warning"
 
 
-def loading_bar_stats_sort_key(item):
-    name = item["name"]
-
+def loading_bar_stats_sort_key(name):
     if isinstance(name, int):
         return (0, str(name))
 
@@ -234,7 +234,8 @@ INSTAGRAM_USER_INFOS_SUBCOMMAND = command(
         "item_label": "username, user url or user id",
         "item_label_plural": "usernames, user urls or user ids",
     },
-    resumer=RowCountResumer
+    resumer=RowCountResumer,
+    buffered_output=True,
 )
 
 INSTAGRAM_USER_POSTS_SUBCOMMAND = command(
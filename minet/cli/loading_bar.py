@@ -4,10 +4,11 @@
 #
 # Various loading bar utilities used by minet CLI.
 #
-from typing import Optional, Iterable, TypeVar, Iterator
+from typing import Optional, Iterable, TypeVar, Iterator, Dict, List, Any
 from minet.types import TypedDict, NotRequired
 
 from contextlib import contextmanager
+from threading import Lock
 from collections import OrderedDict, namedtuple
 from rich.live import Live
 from rich.text import Text
@@ -42,6 +43,37 @@ class CautiousBarColumn(BarColumn):
         return super().render(task)
 
 
+class MemoizedColumn(ProgressColumn):
+    """
+    Progress column reusing its last rendered text as long as the key
+    computed from the task does not change.
+    """
+
+    def __init__(self, table_column: Optional[Column] = None):
+        super().__init__(table_column=table_column)
+        self.last_key = None
+        self.last_text = None
+
+    def key(self, task: Task):
+        raise NotImplementedError
+
+    def render_text(self, task: Task) -> Optional[Text]:
+        raise NotImplementedError
+
+    def render(self, task: Task) -> Optional[Text]:
+        key = self.key(task)
+
+        if self.last_text is not None and key == self.last_key:
+            return self.last_text
+
+        text = self.render_text(task)
+
+        self.last_key = key
+        self.last_text = text
+
+        return text
+
+
 class TimeElapsedColumn(ProgressColumn):
     def render(self, task: Task) -> Text:
         elapsed = task.finished_time if task.finished else task.elapsed
@@ -54,8 +86,11 @@ class TimeElapsedColumn(ProgressColumn):
         )
 
 
-class CompletionColumn(ProgressColumn):
-    def render(self, task: Task) -> Text:
+class CompletionColumn(MemoizedColumn):
+    def key(self, task: Task):
+        return (task.completed, task.total, task.fields.get("unit"))
+
+    def render_text(self, task: Task) -> Text:
         total = format_int(task.total) if task.total is not None else "?"
         completed = format_int(task.completed).rjust(len(total))
 
@@ -65,8 +100,11 @@ class CompletionColumn(ProgressColumn):
         return Text(f"{completed}/{total}{unit_text}")
 
 
-class PercentageColumn(ProgressColumn):
-    def render(self, task: Task) -> Text:
+class PercentageColumn(MemoizedColumn):
+    def key(self, task: Task):
+        return (task.completed, task.total)
+
+    def render_text(self, task: Task) -> Text:
         if task.total is None or task.total == 1:
             return Text("-")
 
@@ -94,37 +132,39 @@ class ThroughputColumn(ProgressColumn):
         return Text(message)
 
 
-class StatsColumn(ProgressColumn):
-    def __init__(self, table_column=None, sort_key=None):
+class StatsColumn(MemoizedColumn):
+    def __init__(self, parent, table_column=None, sort_key=None):
         super().__init__(table_column=table_column)
+        self.__parent = parent
         self.sort_key = sort_key
 
-    def render(self, task: Task) -> Text:
-        stats = task.fields.get("stats")
-
-        if stats is None:
-            return Text("")
+    def key(self, task: Task):
+        parent = self.__parent
 
-        stats_item_shown = 0
+        return (
+            bool(task.description),
+            len(parent.stat_names),
+            tuple(parent.stat_counts),
+            tuple(parent.stat_styles),
+        )
 
-        item_parts = []
+    def render_text(self, task: Task) -> Text:
+        parent = self.__parent
 
-        values = stats.values()
+        items = zip(parent.stat_names, parent.stat_counts, parent.stat_styles)
 
         if self.sort_key is not None:
-            values = sorted(values, key=self.sort_key)
+            sort_key = self.sort_key
+            items = sorted(items, key=lambda item: sort_key(item[0]))
 
-        for item in values:
-            txt = Text()
-
-            count = item["count"]
+        item_parts = []
 
+        for name, count, style in items:
             if count is None:
                 continue
 
-            stats_item_shown += 1
-
-            txt.append(str(item["name"]), style=item["style"])
+            txt = Text()
+            txt.append(str(name), style=style)
             txt.append(" ")
             txt.append(format_int(count))
 
@@ -132,14 +172,17 @@ class StatsColumn(ProgressColumn):
 
         parts = []
 
-        if task.description and stats_item_shown:
+        if task.description and item_parts:
             parts.append(Text("- "))
 
         return Text.assemble(*parts, *Text(" ").join(item_parts))
 
 
-class NestedTotalColumn(ProgressColumn):
-    def render(self, task: Task) -> Optional[Text]:
+class NestedTotalColumn(MemoizedColumn):
+    def key(self, task: Task):
+        return (task.fields.get("sub_total_sum"), task.fields.get("unit"))
+
+    def render_text(self, task: Task) -> Optional[Text]:
         sub_total_sum = task.fields.get("sub_total_sum")
 
         if sub_total_sum is None:
@@ -242,9 +285,22 @@ class LoadingBar(object):
         self.sub_task_id = None
         self.stats_progress = None
         self.stats_task = None
-        self.stats = OrderedDict()
         self.stats_are_shown = False
 
+        # NOTE: stats are stored as parallel arrays, indexed by name, so that
+        # they remain cheap to update and to iterate over when rendering
+        self.stat_indices: Dict[str, int] = {}
+        self.stat_names: List[str] = []
+        self.stat_counts: List[Optional[int]] = []
+        self.stat_styles: List[str] = []
+
+        # NOTE: advances are accumulated and only flushed to the underlying
+        # progress bars when rendering, since updating them is costly and
+        # we can advance thousands of times per second.
+        self.pending_lock = Lock()
+        self.pending_advance = 0
+        self.pending_nested_advance = 0
+
         self.table = Table.grid(expand=True)
 
         # Label line
@@ -327,29 +383,49 @@ class LoadingBar(object):
             for item in stats:
                 count = item.get("initial")
 
-                self.stats[item["name"]] = {
-                    "name": item["name"],
-                    "style": item.get("style", ""),
-                    "count": count,
-                }
+                self.__add_stat(item["name"], count, item.get("style", ""))
 
                 if count is not None:
                     self.stats_are_shown = True
 
-        self.stats_progress = Progress(StatsColumn(sort_key=stats_sort_key))
-        self.stats_task_id = self.stats_progress.add_task("", stats=self.stats)
+        self.stats_progress = Progress(StatsColumn(self, sort_key=stats_sort_key))
+        self.stats_task_id = self.stats_progress.add_task("")
 
         if self.stats_are_shown and not simple:
             self.table.add_row(self.stats_progress)
 
         # Internal live instance
         self.live = Live(
-            self.table,
+            get_renderable=self.__render,
             refresh_per_second=refresh_per_second,
             console=console,
             transient=self.transient,
         )
 
+    def __flush(self) -> None:
+        with self.pending_lock:
+            advance = self.pending_advance
+            nested_advance = self.pending_nested_advance
+
+            self.pending_advance = 0
+            self.pending_nested_advance = 0
+
+        if advance:
+            self.progress.update(self.task_id, advance=advance)
+
+        if nested_advance:
+            assert self.sub_progress is not None and self.sub_task_id is not None
+
+            self.sub_progress.update(
+                self.sub_task_id,
+                advance=nested_advance,
+                sub_total_sum=self.sub_total_sum,
+            )
+
+    def __render(self) -> Table:
+        self.__flush()
+        return self.table
+
     def cursor_up(self) -> None:
         # NOTE: cursor 1up
         console.file.write("\x1b[1A")
@@ -374,6 +450,7 @@ class LoadingBar(object):
         if erase:
             self.live.transient = True
 
+        self.__flush()
         self.live.stop()
         self.already_stopped = True
 
@@ -466,24 +543,43 @@ class LoadingBar(object):
                 self.nested_advance(count)
 
     def advance(self, count=1):
-        self.progress.update(self.task_id, advance=count)
+        with self.pending_lock:
+            self.pending_advance += count
 
     def nested_advance(self, count=1):
         assert self.sub_progress is not None and self.sub_task_id is not None
 
-        self.sub_total_sum += count
-        self.sub_progress.update(
-            self.sub_task_id, advance=count, sub_total_sum=self.sub_total_sum
-        )
+        with self.pending_lock:
+            self.sub_total_sum += count
+            self.pending_nested_advance += count
 
     def nested_reset(self):
         assert self.sub_progress is not None and self.sub_task_id is not None
+
+        # NOTE: pending nested advances belong to the previous step
+        self.__flush()
         self.sub_progress.reset(self.sub_task_id)
 
-    def __refresh_stats(self):
-        assert self.stats_progress is not None
-        self.stats_progress.update(self.stats_task_id, stats=self.stats)
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return OrderedDict(
+            (name, {"name": name, "count": count, "style": style})
+            for name, count, style in zip(
+                self.stat_names, self.stat_counts, self.stat_styles
+            )
+        )
+
+    def __add_stat(self, name: str, count: Optional[int], style: str) -> None:
+        # NOTE: appending the name last so that a concurrent render will
+        # only see complete items
+        self.stat_counts.append(count)
+        self.stat_styles.append(style)
+        self.stat_indices[name] = len(self.stat_names)
+        self.stat_names.append(name)
 
+    def __refresh_stats(self):
+        # NOTE: the stats column directly reads the arrays, so it does
+        # not need to be updated when stats change, only shown.
         if not self.simple and not self.stats_are_shown:
             self.stats_are_shown = True
             self.table.add_row(self.stats_progress)
@@ -509,33 +605,31 @@ class LoadingBar(object):
 
     # TODO: factorize
     def set_stat(self, name: str, count: Optional[int], style: Optional[str] = None):
-        assert self.stats is not None
+        i = self.stat_indices.get(name)
 
-        if name not in self.stats:
-            self.stats[name] = {"name": name, "count": count, "style": style or ""}
+        if i is None:
+            self.__add_stat(name, count, style or "")
         else:
-            item = self.stats[name]
-            item["count"] = count
+            self.stat_counts[i] = count
 
             if style is not None:
-                item["style"] = style
+                self.stat_styles[i] = style
 
         self.__refresh_stats()
 
     def inc_stat(self, name: str, count: int = 1, style: Optional[str] = None):
-        assert self.stats is not None
+        i = self.stat_indices.get(name)
 
-        if name not in self.stats:
-            self.stats[name] = {"name": name, "count": count, "style": style or ""}
+        if i is None:
+            self.__add_stat(name, count, style or "")
         else:
-            item = self.stats[name]
-            if item["count"] is None:
-                item["count"] = count
-            else:
-                item["count"] += count
+            current_count = self.stat_counts[i]
+            self.stat_counts[i] = (
+                count if current_count is None else current_count + count
+            )
 
             if style is not None:
-                item["style"] = style
+                self.stat_styles[i] = style
 
         self.__refresh_stats()
 
@@ -554,10 +648,8 @@ class LoadingBar(object):
             self.set_label(label)
 
         if fields:
-            assert self.stats is not None
-
             for field, count in fields.items():
-                self.stats[field]["count"] = count
+                self.stat_counts[self.stat_indices[field]] = count
 
             self.__refresh_stats()
 
@@ -103,6 +103,7 @@ SCRAPE_COMMAND = command(
     """,
     resolve=resolve_arguments,
     variadic_input={"dummy_column": "path", "optional": True, "no_help": True},
+    buffered_output=True,
     arguments=[
         {
             "name": "scraper",
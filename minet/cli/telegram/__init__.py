@@ -33,6 +33,7 @@ TELEGRAM_CHANNEL_INFOS_SUBCOMMAND = command(
         "item_label": "channel name / url",
         "item_label_plural": "channel names / urls",
     },
+    buffered_output=True,
     arguments=[THROTTLE_ARGUMENT],
 )
 
@@ -16,7 +16,7 @@ from casanova import is_tabular_record_class
 from dataclasses import dataclass
 from glob import iglob
 from copy import copy
-from os.path import join, expanduser, isfile, relpath
+from os.path import join, expanduser, isfile, isabs, relpath
 from collections.abc import Mapping
 from functools import wraps
 from logging import Handler
@@ -32,6 +32,9 @@ from minet.cli.exceptions import FatalError
 from minet.utils import fuzzy_int, message_flatmap
 
 
+PATH_SEPARATORS = (os.sep, os.altsep) if os.altsep else (os.sep,)
+
+
 def colored(string, color):
     return "[{color}]{string}[/{color}]".format(string=string, color=color)
 
@@ -191,10 +194,20 @@ def create_fetch_like_report_iterator(
     headers = reader.headers
     input_dir = cli_args.input_dir or ""
 
+    # NOTE: paths found in reports are usually relative to the input directory,
+    # so we can spare ourselves a call to os.path.join for those rows
+    path_prefix = input_dir
+
+    if path_prefix and not path_prefix.endswith(PATH_SEPARATORS):
+        path_prefix += os.sep
+
     # TODO: deal with no_headers
     assert headers is not None
 
     url_column = getattr(cli_args, "url_column", None)
+    base_url = getattr(cli_args, "base_url", None)
+    default_encoding = cli_args.encoding
+    glob = cli_args.glob
 
     path_pos = headers.get(cli_args.column) if cli_args.column is not None else None
     error_pos = headers.get(cli_args.error_column)
@@ -205,9 +218,7 @@ def create_fetch_like_report_iterator(
     url_pos = headers.get(url_column) if url_column is not None else None
 
     for i, row in reader.enumerate():
-        item = FetchReportLikeItem(index=i, row=row)
-
-        item.url = getattr(cli_args, "base_url", None)
+        item = FetchReportLikeItem(index=i, row=row, url=base_url)
 
         if url_pos is not None:
             url = get(row, url_pos, "").strip()
@@ -226,13 +237,15 @@ def create_fetch_like_report_iterator(
         if status_pos is not None:
             status = get(row, status_pos)
 
-            if status:
-                status = fuzzy_int(status)
+            # NOTE: avoiding int conversion in the overwhelmingly common case
+            if status != "200":
+                if status:
+                    status = fuzzy_int(status)
 
-            if status != 200:
-                item.error = "invalid-status"
-                yield item
-                continue
+                if status != 200:
+                    item.error = "invalid-status"
+                    yield item
+                    continue
 
         if mimetype_pos is not None:
             mimetype = get(row, mimetype_pos, "text/html").strip()
@@ -246,7 +259,7 @@ def create_fetch_like_report_iterator(
             path = get(row, path_pos, "").strip()
 
             if path:
-                item.path = join(input_dir, path)
+                item.path = path if isabs(path) else path_prefix + path
 
         if body_pos is not None:
             body = get(row, body_pos)
@@ -260,7 +273,7 @@ def create_fetch_like_report_iterator(
             continue
 
         # NOTE: can be None, which means we will guess
-        item.encoding = cli_args.encoding
+        item.encoding = default_encoding
 
         if encoding_pos is not None:
             encoding = get(row, encoding_pos, "").strip()
@@ -273,7 +286,7 @@ def create_fetch_like_report_iterator(
 
                 item.encoding = encoding
 
-        if cli_args.glob:
+        if glob:
             for p in iglob(item.path, recursive=True):
                 new_item = copy(item)
                 new_item.path = relpath(p, start=input_dir)
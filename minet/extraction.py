@@ -84,11 +84,15 @@ class TrafilaturaResult(TabularRecord):
         return "\n".join(items)
 
 
-def extract(text: str) -> Optional[TrafilaturaResult]:
+def extract(text: str, fast: bool = False) -> Optional[TrafilaturaResult]:
     # Attempting extraction
     try:
         # https://trafilatura.readthedocs.io/en/latest/corefunctions.html
-        trafilatura_bare_result = bare_extraction(text, with_metadata=True)
+        # NOTE: `no_fallback` skips the readability & justext fallbacks, which
+        # are run in pure python and dominate extraction time.
+        trafilatura_bare_result = bare_extraction(
+            text, with_metadata=True, no_fallback=fast
+        )
     except Exception as e:
         raise TrafilaturaError(reason=e)
 
@@ -31,6 +31,8 @@ from minet.utils import md5, PseudoFStringFormatter
 from minet.encodings import infer_encoding
 from minet.sqlar import SQLiteArchive
 
+READ_BUFFER_SIZE = 1 << 16
+
 
 def read_potentially_gzipped_path(
     path,
@@ -38,28 +40,36 @@ def read_potentially_gzipped_path(
     errors: str = "replace",
     fallback_encoding: Optional[str] = None,
 ) -> str:
-    open_fn = open
-    flag = "r" if encoding is not None else "rb"
-
-    if path.endswith(".gz"):
-        open_fn = gzip.open
-        flag = "rt" if encoding is not None else "r"
+    # NOTE: reading the whole file as bytes and then decoding it in one go
+    # is faster than relying on a text wrapper and its incremental decoder
+    with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+        # NOTE: a plain read will size its buffer using fstat, but gzip
+        # reads its underlying file by small chunks, hence the larger buffer
+        if path.endswith(".gz"):
+            with gzip.GzipFile(fileobj=f, mode="rb") as gf:
+                binary = gf.read()
+        else:
+            binary = f.read()
 
     if encoding is None:
-        with open_fn(path, flag) as f:
-            binary = f.read()
-            encoding = infer_encoding(binary)
+        encoding = infer_encoding(binary)
+
+        if encoding is None:
+            if fallback_encoding is not None:
+                encoding = fallback_encoding
+            else:
+                raise CouldNotInferEncodingError
+
+        return binary.decode(encoding, errors=errors)
 
-            if encoding is None:
-                if fallback_encoding is not None:
-                    encoding = fallback_encoding
-                else:
-                    raise CouldNotInferEncodingError
+    text = binary.decode(encoding, errors=errors)
 
-            return binary.decode(encoding, errors=errors)
+    # NOTE: files with a known encoding used to be read in text mode, so we
+    # need to translate newlines the same way universal newlines would
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
 
-    with open_fn(path, flag, encoding=encoding, errors=errors) as f:
-        return f.read()
+    return text
 
 
 @with_defer()
@@ -1,10 +1,30 @@
-from typing import Iterable, List, Set, Iterator, Any, Optional, Literal
+from typing import (
+    Iterable,
+    List,
+    Set,
+    Iterator,
+    Any,
+    Optional,
+    Literal,
+    Dict,
+    Tuple,
+)
 
 from dataclasses import dataclass
 from ural.lru import CanonicalizedLRUTrie
-from ural import links_from_html, could_be_html, infer_redirection, canonicalize_url
+from ural import (
+    urls_from_html,
+    should_follow_href,
+    is_url,
+    could_be_html,
+    infer_redirection,
+    canonicalize_url,
+)
+from ural.utils import urljoin
+from ural.patterns import PROTOCOL_RE
 from casanova import TabularRecord
 from functools import lru_cache
+from urllib.parse import urlsplit
 
 from minet.crawl.spiders import Spider, SpiderResult
 from minet.crawl.types import CrawlJob, SuccessfulCrawlResult
@@ -14,6 +34,9 @@ VALID_WEBENTITY_STATUSES = ["IN", "OUT", "UNDECIDED", "DISCOVERED"]
 
 WebentityStatus = Literal["IN", "OUT", "UNDECIDED", "DISCOVERED"]
 
+ORIGIN_STEM_PREFIXES = ("s:", "t:", "h:")
+ORIGIN_MATCH_CACHE_MAX_SIZE = 4096
+
 
 @dataclass
 class WebentityRecord:
@@ -21,6 +44,10 @@ class WebentityRecord:
     status: WebentityStatus
 
 
+# NOTE: maps (scheme, netloc) to the spider version and the matching record
+OriginMatchCache = Dict[Tuple[str, str], Tuple[int, Optional[WebentityRecord]]]
+
+
 @dataclass
 class WebentityLink(TabularRecord):
     source_webentity: str
@@ -35,17 +62,64 @@ class HypheSpiderAddendum:
     links: List[WebentityLink]
 
 
+# NOTE: this is the same as ural.links_from_html, except that we skip raw
+# hrefs we have already seen before joining and canonicalizing them, since
+# pages usually repeat the same links a lot (menus, footers etc.).
+# It mirrors ural 1.4.0 (ural/links_from_html.py, with canonicalize, unique
+# and strip_fragment enabled), so it should be kept in sync when bumping ural.
+# test/hyphe_test.py checks both still agree.
 def extract_links(url: str, body: bytes, encoding: str) -> List[str]:
-    return list(
-        links_from_html(
-            url,
-            body,
-            encoding=encoding,
-            canonicalize=True,
-            unique=True,
-            strip_fragment=True,
-        )
-    )
+    base_url = canonicalize_url(url, strip_fragment=True)
+
+    seen_hrefs: Set[str] = set()
+    seen_links: Set[str] = set()
+    links: List[str] = []
+
+    for href in urls_from_html(body, encoding=encoding, errors="replace"):
+        if not href or href in seen_hrefs:
+            continue
+
+        seen_hrefs.add(href)
+
+        if not should_follow_href(href):
+            continue
+
+        link = href
+
+        # NOTE: urllib.parse.urljoin lowercases protocol...
+        if not PROTOCOL_RE.match(link):
+            link = urljoin(base_url, link)
+
+        if not is_url(
+            link,
+            require_protocol=True,
+            tld_aware=True,
+            allow_spaces_in_path=True,
+            only_http_https=True,
+        ):
+            continue
+
+        link = canonicalize_url(link, strip_fragment=True)
+
+        if link == base_url or link in seen_links:
+            continue
+
+        seen_links.add(link)
+        links.append(link)
+
+    return links
+
+
+def origin_stems(stems: List[str]) -> Tuple[str, ...]:
+    i = 0
+
+    for stem in stems:
+        if not stem.startswith(ORIGIN_STEM_PREFIXES):
+            break
+
+        i += 1
+
+    return tuple(stems[:i])
 
 
 @lru_cache(2048)
@@ -66,6 +140,20 @@ class HypheSpider(Spider):
         self.start_pages: Set[str] = set()
         self.ignore_internal_links = ignore_internal_links
 
+        # NOTE: origins for which some webentity prefix goes deeper than the
+        # host, meaning we cannot match urls using their origin alone
+        self.origins_with_deeper_prefixes: Set[Tuple[str, ...]] = set()
+
+        # NOTE: incremented each time a prefix is set, so that origin caches
+        # can tell when their entries might be stale
+        self.version = 0
+
+        # NOTE: outlinks of a crawl tend to share a handful of origins, so we
+        # avoid tokenizing and matching them against the trie each time. The
+        # cache is kept across pages and shared by the crawler's threads,
+        # which is fine since entries are immutable tuples.
+        self.origin_match_cache: OriginMatchCache = {}
+
     def start(self) -> Iterable[str]:
         yield from self.start_pages
 
@@ -79,7 +167,43 @@ class HypheSpider(Spider):
         if status not in VALID_WEBENTITY_STATUSES:
             raise TypeError("invalid webentity status: {!r}".format(status))
 
-        self.trie.set(prefix, WebentityRecord(id=webentity, status=status))
+        stems = [stem for stem in self.trie.tokenize(prefix) if stem != "p:"]
+        origin = origin_stems(stems)
+
+        if len(origin) < len(stems):
+            self.origins_with_deeper_prefixes.add(origin)
+
+        self.trie.set_lru(stems, WebentityRecord(id=webentity, status=status))
+        self.version += 1
+
+    def match_with_cache(
+        self, url: str, cache: Optional[OriginMatchCache] = None
+    ) -> Optional[WebentityRecord]:
+        if cache is None:
+            cache = self.origin_match_cache
+
+        try:
+            parsed = urlsplit(url)
+        except ValueError:
+            return self.trie.match(url)
+
+        key = (parsed.scheme, parsed.netloc)
+        entry = cache.get(key)
+
+        if entry is not None and entry[0] == self.version:
+            return entry[1]
+
+        stems = self.trie.tokenize(url)
+        match = self.trie.match_lru(stems)
+
+        if origin_stems(stems) not in self.origins_with_deeper_prefixes:
+            # NOTE: crude bound, cheaper than an LRU on such a hot path
+            if len(cache) >= ORIGIN_MATCH_CACHE_MAX_SIZE:
+                cache.clear()
+
+            cache[key] = (self.version, match)
+
+        return match
 
     def process(self, job: CrawlJob, response: Response) -> SpiderResult:
         if response.status != 200:
@@ -109,7 +233,7 @@ class HypheSpider(Spider):
             # if is_shortened_url(url):
             #     url = resolve_shortened_link(url)
 
-            match = self.trie.match(url)
+            match = self.match_with_cache(url)
 
             if match is None:
                 continue
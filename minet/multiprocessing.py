@@ -4,8 +4,11 @@
 #
 # Multiple helper functions related to multiprocessing execution.
 #
+from typing import Optional
+
 import sys
 import multiprocessing
+from threading import Semaphore
 
 
 def half_cpus(override=None):
@@ -24,6 +27,20 @@ def half_cpus(override=None):
     return half
 
 
+def infer_chunksize(
+    total: Optional[int], processes: int, default_total: int = 10_000, cap: int = 64
+) -> int:
+    """
+    Function returning a sensible chunksize to use with Pool.imap so that
+    IPC costs are amortized while keeping each process busy with a fair
+    share of the tasks.
+    """
+    if total is None:
+        total = default_total
+
+    return max(1, min(cap, total // (processes * 64)))
+
+
 # NOTE: this is a class and not a decorator so it can be pickled
 class WorkerWrapper(object):
     __slots__ = ("fn",)
@@ -61,13 +78,54 @@ class LazyPool(object):
             if initializer is not None:
                 initializer(*initargs)
 
-    def imap(self, worker, tasks, chunksize: int = 1, unordered: bool = False):
+    def imap(
+        self,
+        worker,
+        tasks,
+        chunksize: int = 1,
+        unordered: bool = False,
+        max_pending: Optional[int] = None,
+    ):
         if self.actually_multiprocessed:
             assert self.inner_pool is not None
 
             fn = self.inner_pool.imap_unordered if unordered else self.inner_pool.imap
 
-            yield from fn(WorkerWrapper(worker), tasks, chunksize=chunksize)
+            if max_pending is None:
+                yield from fn(WorkerWrapper(worker), tasks, chunksize=chunksize)
+                return
+
+            # NOTE: Pool.imap drains the given iterator eagerly in its task
+            # handler thread, so we need to throttle it ourselves if we don't
+            # want to keep the whole remaining input in memory.
+            # NOTE: we need to allow at least one full chunk to be buffered
+            # else the task handler would block forever.
+            max_pending = max(max_pending, chunksize)
+            semaphore = Semaphore(max_pending)
+            closed = False
+
+            def bounded_tasks():
+                for task in tasks:
+                    semaphore.acquire()
+
+                    if closed:
+                        return
+
+                    yield task
+
+            try:
+                for result in fn(
+                    WorkerWrapper(worker), bounded_tasks(), chunksize=chunksize
+                ):
+                    semaphore.release()
+                    yield result
+            finally:
+                # NOTE: unblocking the task handler thread so the pool
+                # can be terminated properly
+                closed = True
+
+                for _ in range(max_pending):
+                    semaphore.release()
         else:
             for task in tasks:
                 yield worker(task)
@@ -7,6 +7,8 @@
 import itertools
 import soupsieve
 from io import StringIO
+from functools import lru_cache
+from bs4 import Tag
 
 from minet.scrape.constants import EXTRACTOR_NAMES
 
@@ -87,6 +89,18 @@ class CompilerContext(object):
             self.print("value_{parent} = %s" % expr, **kwargs)
 
 
+# NOTE: compiled functions are cached by generated source so that compiling
+# the same definition repeatedly does not pay for the exec again.
+@lru_cache(maxsize=64)
+def exec_scraper_source(source):
+    scope = {"soupsieve": soupsieve, "Tag": Tag}
+
+    # Execute in scope to create function
+    exec(compile(source, "<minet-compiled-scraper>", "exec"), scope)
+
+    return scope["scrape"]
+
+
 class FieldsNode(object):
     def __init__(self, definition):
         self.definition = definition
@@ -108,7 +122,13 @@ def compile_scraper(definition, as_string=False):
 
         print(string, file=output)
 
-    scope = {"soupsieve": soupsieve}
+    # NOTE: selectors are compiled once at the module level of the
+    # generated code instead of being parsed at each call
+    selectors = []
+
+    # NOTE: binding methods once spares us an attribute lookup per
+    # extracted value
+    preamble = ["get_text = Tag.get_text", "get_attr = Tag.get"]
 
     printer("def scrape(root, context={}):")
     printer("  value_0 = None")
@@ -120,13 +140,13 @@ def compile_scraper(definition, as_string=False):
     def recurse(node, context):
         # Default extraction
         if node is None or (isinstance(node, str) and node in EXTRACTOR_NAMES):
-            context.yield_to_parent("element_{id}.get_text().strip()")
+            context.yield_to_parent("get_text(element_{id}).strip()")
             return
 
         # Attribute
         if isinstance(node, str):
             context.yield_to_parent(
-                "element_{id}.get({attr})", attr=escape_string_as_literal(node)
+                "get_attr(element_{id}, {attr})", attr=escape_string_as_literal(node)
             )
             return
 
@@ -153,9 +173,15 @@ def compile_scraper(definition, as_string=False):
         if "iterator" in node:
             context.container_type = "list"
 
+            selector_id = len(selectors)
+            selectors.append(
+                "selector_%i = soupsieve.compile(%s)"
+                % (selector_id, escape_string_as_literal(node["iterator"]))
+            )
+
             context.print(
-                "elements_{id} = soupsieve.select({selector}, element_{id})",
-                selector=escape_string_as_literal(node["iterator"]),
+                "elements_{id} = selector_{selector_id}.select(element_{id})",
+                selector_id=selector_id,
             )
             context.print("value_{id} = []")
 
@@ -172,11 +198,11 @@ def compile_scraper(definition, as_string=False):
 
     printer("  return value_0")
 
+    source = "".join(line + "\n" for line in preamble + selectors)
+    source += output.getvalue()
+
     # Only return string
     if as_string:
-        return output.getvalue()
+        return source
 
-    # Execute in scope to create function
-    exec(output.getvalue(), scope)
-
-    return scope["scrape"]
+    return exec_scraper_source(source)
@@ -4,21 +4,57 @@
 #
 # Twitter public API "scraper".
 #
+# Performance notes:
+#
+# Searching is I/O bound, not compute bound: there is nothing to vectorize
+# or JIT here. In decreasing order, time is spent:
+#
+#   1. waiting for the rate limiter (5 search calls per minute),
+#   2. establishing connections (TCP+TLS), which is why a single keep-alive
+#      pool is shared process-wide,
+#   3. network round-trips, partly hidden by prefetching the next page
+#      while the current one is consumed,
+#   4. decoding JSON payloads (use orjson if you can),
+#   5. recombobulating & normalizing tweets, which only depends on
+#      dict lookups.
+#
+# So please measure before optimizing the last items.
+#
 from typing import Optional
 
 import time
 import json
 import datetime
+from email.utils import parsedate_to_datetime
+import urllib3
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock, Event
 from urllib.parse import urlencode, quote
 from twitwi import normalize_tweet, normalize_user
-from ebbe import with_is_first, getpath, pathgetter
+from ebbe import with_is_first
 from json import JSONDecodeError
 from tenacity import RetryCallState
+from tenacity.wait import wait_base
+
+# NOTE: orjson is an optional dependency which decodes large payloads
+# significantly faster than the standard library
+ORJSON_SUPPORT = False
+
+try:
+    from orjson import loads as json_loads
+
+    ORJSON_SUPPORT = True
+except ImportError:
+    from json import loads as json_loads
 
 from minet.web import (
+    DelegatedThread,
     create_pool_manager,
     request,
     create_request_retryer,
+    request_retryer_custom_exponential_backoff,
+    request_retryer_decorrelated_jitter_backoff,
     retrying_method,
 )
 from minet.cookies import (
@@ -56,6 +92,20 @@ TWITTER_GUEST_ACTIVATE_ENDPOINT = "https://api.twitter.com/1.1/guest/activate.js
 MAXIMUM_QUERY_LENGTH = 500
 DEFAULT_COUNT = 100  # NOTE: the actual upper limit seems to be 20, but I keep 100 just in case it changes in the future, who knows...
 MAX_GUEST_TOKEN_USE_COUNT = 100
+GUEST_TOKEN_TTL = 3 * 60 * 60
+MAXIMUM_RETRY_SLEEP = 15 * 60
+MAXIMUM_RETRY_DELAY = 6 * 60 * 60
+MAXIMUM_RETRY_ATTEMPTS = 10
+RATE_LIMIT_RETRY_MIN = 60
+INVALID_RESPONSE_RETRY_MIN = 0.25
+TWEET_ENTRY_ID_PREFIXES = ("sq-I-t-", "tweet-")
+
+# NOTE: GraphQL urls are split around their only moving parts so that they
+# can be assembled by concatenation rather than formatting a ~1.5KB template
+TWEET_SEARCH_URL_HEAD = "https://twitter.com/i/api/graphql/L1VfBERtzc3VkBBT0YAYHA/SearchTimeline?variables=%7B%22rawQuery%22%3A"
+TWEET_SEARCH_URL_TAIL = "%2C%22querySource%22%3A%22typed_query%22%2C%22product%22%3A%22Latest%22%7D&features=%7B%22rweb_lists_timeline_redesign_enabled%22%3Atrue%2C%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D&fieldToggles=%7B%22withArticleRichContentState%22%3Afalse%7D"
+FOLLOWERS_YOU_KNOW_URL_HEAD = "https://twitter.com/i/api/graphql/sT_K0qB2bqpWfL3-cq4zaQ/FollowersYouKnow?variables=%7B%22userId%22%3A%22"
+FOLLOWERS_YOU_KNOW_URL_TAIL = "%2C%22includePromotedContent%22%3Afalse%7D&features=%7B%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22c9s_tweet_anatomy_moderator_badge_enabled%22%3Atrue%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22rweb_video_timestamps_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D"
 
 
 # =============================================================================
@@ -65,6 +115,217 @@ def is_query_too_long(query):
     return len(quote(query)) > MAXIMUM_QUERY_LENGTH
 
 
+def walk_path(target, path):
+    # NOTE: this is faster than ebbe.getpath since we don't need to check
+    # the type of each intermediate value
+    try:
+        for key in path:
+            target = target[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    return target
+
+
+def parse_json_response(response):
+    # NOTE: decoding straight from the raw body avoids materializing, and
+    # caching on the response, a full text copy of the payload
+    try:
+        return json_loads(response.body)
+    except (JSONDecodeError, UnicodeDecodeError):
+        pass
+
+    # NOTE: orjson rejects some payloads the standard library accepts, e.g.
+    # integers wider than 64 bits, and retrying would not change a thing
+    if ORJSON_SUPPORT:
+        try:
+            return json.loads(response.body)
+        except (JSONDecodeError, UnicodeDecodeError):
+            pass
+
+    raise TwitterPublicAPIInvalidResponseError(
+        status=response.status, response_text=response.text
+    )
+
+
+def get_retry_after(response) -> Optional[float]:
+    retry_after = response.headers.get("retry-after")
+
+    if retry_after is not None:
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            pass
+
+        # NOTE: Retry-After can also be given as an HTTP date
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    reset_at = response.headers.get("x-rate-limit-reset")
+
+    if reset_at is not None:
+        try:
+            return max(0, float(reset_at) - time.time())
+        except ValueError:
+            pass
+
+    return None
+
+
+class twitter_api_retryer_wait(wait_base):
+    """
+    Wait strategy used by the scrapers' retryers:
+
+    * rate limits use decorrelated jitter with a large base, never waking up
+      before the time given by the API, so that concurrent workers don't all
+      hit the API again at once.
+    * invalid responses are often one-off glitches and are retried quickly
+      first, then with the usual exponential backoff.
+    * everything else uses the usual exponential backoff.
+
+    Sleeps are clipped so they never go past `max_delay` seconds since the
+    first attempt, since the retryer will stop there anyway.
+    """
+
+    def __init__(
+        self, min: float = 1, max_delay: Optional[float] = MAXIMUM_RETRY_DELAY
+    ) -> None:
+        self.max_delay = max_delay
+        self.default = request_retryer_custom_exponential_backoff(min=min)
+        self.invalid_response = request_retryer_custom_exponential_backoff(
+            min=INVALID_RESPONSE_RETRY_MIN
+        )
+        self.rate_limit = request_retryer_decorrelated_jitter_backoff(
+            min=RATE_LIMIT_RETRY_MIN, max=MAXIMUM_RETRY_SLEEP
+        )
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception()
+
+        if isinstance(exc, TwitterPublicAPIRateLimitError):
+            result = self.rate_limit.next_sleep(
+                retry_state, at_least=exc.retry_after or 0
+            )
+        elif isinstance(exc, TwitterPublicAPIInvalidResponseError):
+            result = self.invalid_response(retry_state)
+        else:
+            result = self.default(retry_state)
+
+        if self.max_delay is not None and retry_state.seconds_since_start is not None:
+            result = min(
+                result, max(0, self.max_delay - retry_state.seconds_since_start)
+            )
+
+        return result
+
+
+class PrefetchedCall:
+    """
+    Class running a call in a daemon thread so that it can overlap with
+    the consumption of a previous result. Exceptions are raised back when
+    calling the result method.
+
+    The call is given a `cancel_event` keyword argument that will be set
+    when calling the cancel method, so that it can give up before doing
+    any work whose result won't be needed anymore.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        self.value = None
+        self.exception = None
+        self.cancel_event = Event()
+
+        kwargs["cancel_event"] = self.cancel_event
+
+        # NOTE: the thread only works on behalf of its caller, so it should
+        # not be reported as a separate worker when logging retries
+        self.thread = DelegatedThread(
+            target=self.__run, args=(fn, args, kwargs), daemon=True
+        )
+        self.thread.start()
+
+    def __run(self, fn, args, kwargs):
+        try:
+            self.value = fn(*args, **kwargs)
+        except BaseException as e:
+            self.exception = e
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def result(self):
+        self.thread.join()
+
+        if self.exception is not None:
+            raise self.exception
+
+        return self.value
+
+
+def forge_cursor_variable(cursor: Optional[str]) -> str:
+    if cursor is None:
+        return ""
+
+    return "%2C%22cursor%22%3A%22" + quote(cursor) + "%22"
+
+
+@lru_cache(64)
+def forge_tweet_search_url_prefix(query: str) -> str:
+    return (
+        TWEET_SEARCH_URL_HEAD
+        + quote(json.dumps(query, ensure_ascii=False))
+        + "%2C%22count%22%3A20"
+    )
+
+
+def forge_tweet_search_url(query: str, cursor: Optional[str] = None) -> str:
+    return (
+        forge_tweet_search_url_prefix(query)
+        + forge_cursor_variable(cursor)
+        + TWEET_SEARCH_URL_TAIL
+    )
+
+
+def forge_followers_you_know_url(user_id: str, cursor: Optional[str] = None) -> str:
+    return (
+        FOLLOWERS_YOU_KNOW_URL_HEAD
+        + quote(user_id)
+        + "%22%2C%22count%22%3A20"
+        + forge_cursor_variable(cursor)
+        + FOLLOWERS_YOU_KNOW_URL_TAIL
+    )
+
+
+SHARED_POOL_MAXSIZE = 4
+SHARED_POOL_TIMEOUT = 60
+SHARED_POOL_MANAGER: Optional[urllib3.PoolManager] = None
+SHARED_POOL_MANAGER_LOCK = Lock()
+
+
+def get_shared_pool_manager() -> urllib3.PoolManager:
+    global SHARED_POOL_MANAGER
+
+    # NOTE: every call hits the same hosts, so all scrapers of the process
+    # share keep-alive connections, which means the TCP+TLS handshake is only
+    # paid once per connection, even across queries. The pool is blocking so
+    # that it never opens more than SHARED_POOL_MAXSIZE connections per host,
+    # which is why requests wait at most SHARED_POOL_TIMEOUT seconds for a
+    # free connection (they raise EmptyPoolError and are retried otherwise)
+    with SHARED_POOL_MANAGER_LOCK:
+        if SHARED_POOL_MANAGER is None:
+            SHARED_POOL_MANAGER = create_pool_manager(
+                parallelism=SHARED_POOL_MAXSIZE,
+                timeout=TWITTER_PUBLIC_API_DEFAULT_TIMEOUT,
+                spoof_tls_ciphers=True,
+                block=True,
+            )
+
+        return SHARED_POOL_MANAGER
+
+
 def is_cookie_valid(cookie: Optional[str]) -> bool:
     if cookie is None:
         return False
@@ -82,25 +343,38 @@ def ensure_guest_token(method):
     def wrapped(self: "TwitterGuestAPIScraper", *args, **kwargs):
         # NOTE: we refresh the guest token periodically to avoid
         # losing time wrt failed request after expiration
-        if (
-            self.guest_token is None
-            or self.guest_token_use_count >= MAX_GUEST_TOKEN_USE_COUNT
-        ):
+        if not self.use_guest_token():
             self.acquire_guest_token()
-            self.guest_token_use_count = 0
 
-        self.guest_token_use_count += 1
         return method(self, *args, **kwargs)
 
     return wrapped
 
 
 def create_cookie_expiration():
-    return datetime.datetime.utcfromtimestamp(time.time() + 10800).strftime(
+    return datetime.datetime.utcfromtimestamp(time.time() + GUEST_TOKEN_TTL).strftime(
         "%a, %d %b %Y %H:%M:%S GMT"
     )
 
 
+@dataclass
+class GuestToken:
+    token: str
+    cookie: str
+    acquired_at: float
+
+    # NOTE: uses are counted on the token itself since it is shared by every
+    # scraper, and must only be read or written under the scrapers' lock
+    use_count: int = 0
+
+    def is_expired(self) -> bool:
+        # NOTE: we keep a margin so the token does not expire mid-search
+        return time.time() - self.acquired_at > GUEST_TOKEN_TTL * 0.9
+
+    def is_usable(self) -> bool:
+        return self.use_count < MAX_GUEST_TOKEN_USE_COUNT and not self.is_expired()
+
+
 TWEET_SEARCH_DEFAULT_PARAMS = {
     "include_profile_interstitial_type": "1",
     "include_blocking": "1",
@@ -187,122 +461,122 @@ def forge_search_params(query, target="tweets", count=DEFAULT_COUNT, cursor=None
     return urlencode(params, quote_via=quote)
 
 
-CURSOR_FIRST_POSSIBLE_PATH_GETTER = pathgetter(
-    [
-        "timeline",
-        "instructions",
-        0,
-        "addEntries",
-        "entries",
-        -1,
-        "content",
-        "operation",
-        "cursor",
-        "value",
-    ]
+CURSOR_FIRST_POSSIBLE_PATH = (
+    "timeline",
+    "instructions",
+    0,
+    "addEntries",
+    "entries",
+    -1,
+    "content",
+    "operation",
+    "cursor",
+    "value",
 )
 
-CURSOR_SECOND_POSSIBLE_PATH_GETTER = pathgetter(
-    [
-        "timeline",
-        "instructions",
-        -1,
-        "replaceEntry",
-        "entry",
-        "content",
-        "operation",
-        "cursor",
-        "value",
-    ]
+CURSOR_SECOND_POSSIBLE_PATH = (
+    "timeline",
+    "instructions",
+    -1,
+    "replaceEntry",
+    "entry",
+    "content",
+    "operation",
+    "cursor",
+    "value",
 )
 
-CURSOR_THIRD_POSSIBLE_PATH_GETTER = pathgetter(
-    [
-        "data",
-        "search_by_raw_query",
-        "search_timeline",
-        "timeline",
-        "instructions",
-        0,
-        "entries",
-        -1,
-        "content",
-        "value",
-    ]
+CURSOR_THIRD_POSSIBLE_PATH = (
+    "data",
+    "search_by_raw_query",
+    "search_timeline",
+    "timeline",
+    "instructions",
+    0,
+    "entries",
+    -1,
+    "content",
+    "value",
 )
 
-CURSOR_FOURTH_POSSIBLE_PATH_GETTER = pathgetter(
-    [
-        "data",
-        "search_by_raw_query",
-        "search_timeline",
-        "timeline",
-        "instructions",
-        -1,
-        "entry",
-        "content",
-        "value",
-    ]
+CURSOR_FOURTH_POSSIBLE_PATH = (
+    "data",
+    "search_by_raw_query",
+    "search_timeline",
+    "timeline",
+    "instructions",
+    -1,
+    "entry",
+    "content",
+    "value",
 )
 
-CURSOR_USER_PATH_GETTER = pathgetter(
-    [
-        "timeline",
-        "instructions",
-        -1,
-        "addEntries",
-        "entries",
-        -1,
-        "content",
-        "operation",
-        "cursor",
-        "value",
-    ]
+CURSOR_USER_PATH = (
+    "timeline",
+    "instructions",
+    -1,
+    "addEntries",
+    "entries",
+    -1,
+    "content",
+    "operation",
+    "cursor",
+    "value",
 )
 
-ENTRIES_FOLLOWER_YOU_KNOW_PATH_GETTER = pathgetter(
-    ["data", "user", "result", "timeline", "timeline", "instructions", -1, "entries"]
+ENTRIES_FOLLOWER_YOU_KNOW_PATH = (
+    "data",
+    "user",
+    "result",
+    "timeline",
+    "timeline",
+    "instructions",
+    -1,
+    "entries",
 )
 
 
 def extract_cursor_from_tweets_payload(payload):
-    found_cursor = CURSOR_FIRST_POSSIBLE_PATH_GETTER(payload)
+    found_cursor = walk_path(payload, CURSOR_FIRST_POSSIBLE_PATH)
 
     if found_cursor is None:
-        found_cursor = CURSOR_SECOND_POSSIBLE_PATH_GETTER(payload)
+        found_cursor = walk_path(payload, CURSOR_SECOND_POSSIBLE_PATH)
 
     if found_cursor is None:
-        found_cursor = CURSOR_THIRD_POSSIBLE_PATH_GETTER(payload)
+        found_cursor = walk_path(payload, CURSOR_THIRD_POSSIBLE_PATH)
 
     if found_cursor is None:
-        found_cursor = CURSOR_FOURTH_POSSIBLE_PATH_GETTER(payload)
+        found_cursor = walk_path(payload, CURSOR_FOURTH_POSSIBLE_PATH)
 
     return found_cursor
 
 
 def extract_cursor_from_users_payload(payload):
-    return CURSOR_USER_PATH_GETTER(payload)
+    return walk_path(payload, CURSOR_USER_PATH)
 
 
 def extract_data_from_followers_you_know_payload(payload):
-    entries = ENTRIES_FOLLOWER_YOU_KNOW_PATH_GETTER(payload)
+    entries = walk_path(payload, ENTRIES_FOLLOWER_YOU_KNOW_PATH)
 
     if entries is None:
         return None, []
 
-    bottom_cursor_node = next(
-        (entry for entry in entries if entry["entryId"].startswith("cursor-bottom")),
-        None,
-    )
+    # NOTE: cursor and users are collected in a single pass over the entries
+    bottom_cursor = None
+    users = []
+
+    for entry in entries:
+        entry_id = entry["entryId"]
+
+        if entry_id.startswith("user-"):
+            users.append(entry["content"]["itemContent"]["user_results"]["result"])
+        elif bottom_cursor is None and entry_id.startswith("cursor-bottom"):
+            bottom_cursor = entry["content"]["value"]
 
-    if bottom_cursor_node is None:
+    if bottom_cursor is None:
         return None, []
 
-    return bottom_cursor_node["content"]["value"], [
-        entry["content"]["itemContent"]["user_results"]["result"]
-        for entry in entries
-        if entry["entryId"].startswith("user-")
-    ]
+    return bottom_cursor, users
 
 
 def process_single_tweet(tweet_id, tweet_index, user_index):
@@ -380,7 +654,7 @@ def recombobulate_tweet(tweet_root, entry_id=None):
     ]["legacy"]
 
     # Quote
-    quoted_root = getpath(tweet_root, ["quoted_status_result", "result"])
+    quoted_root = walk_path(tweet_root, ("quoted_status_result", "result"))
 
     if quoted_root is not None:
         if quoted_root["__typename"] == "TweetWithVisibilityResults":
@@ -421,11 +695,11 @@ def tweets_payload_iter(payload):
             entry_id = entry["entryId"]
 
             # Filtering tweets
-            if not entry_id.startswith("sq-I-t-") and not entry_id.startswith("tweet-"):
+            if not entry_id.startswith(TWEET_ENTRY_ID_PREFIXES):
                 continue
 
-            tweet_root = getpath(
-                entry, ["content", "itemContent", "tweet_results", "result"]
+            tweet_root = walk_path(
+                entry, ("content", "itemContent", "tweet_results", "result")
             )
 
             # Parsing error?
@@ -461,9 +735,7 @@ def tweets_payload_iter(payload):
 # =============================================================================
 class TwitterAPIScraper:
     def __init__(self, cookie: str):
-        self.pool_manager = create_pool_manager(
-            timeout=TWITTER_PUBLIC_API_DEFAULT_TIMEOUT, spoof_tls_ciphers=True
-        )
+        self.pool_manager = get_shared_pool_manager()
 
         # NOTE: 5 calls per minute
         self.rate_limiter_state = RateLimiterState(5, 60)
@@ -495,6 +767,20 @@ class TwitterAPIScraper:
 
         self.csrf_token = get_cookie_morsel_value(self.cookie, "ct0")
 
+        # NOTE: credentials won't change during the scraper's lifetime so
+        # we can build the API headers once and for all
+        self.api_headers = {
+            "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
+            # "X-Guest-Token": self.guest_token,
+            "Cookie": self.cookie,
+            "Accept-Language": "en-US,en;q=0.5",
+            "Connection": "keep-alive",
+            "X-Csrf-Token": self.csrf_token,
+            "X-Twitter-Active-User": "yes",
+            "X-Twitter-Auth-Type": "OAuth2Session",
+            "X-Twitter-Client-Language": "en",
+        }
+
         def epilog_builder(retry_state: RetryCallState):
             exc = retry_state.outcome.exception()
 
@@ -505,6 +791,9 @@ class TwitterAPIScraper:
 
         self.retryer = create_request_retryer(
             min=1,
+            max_attempts=MAXIMUM_RETRY_ATTEMPTS,
+            max_delay=MAXIMUM_RETRY_DELAY,
+            wait=twitter_api_retryer_wait(min=1),
             additional_exceptions=[
                 TwitterPublicAPIRateLimitError,
                 TwitterPublicAPIInvalidResponseError,
@@ -512,6 +801,7 @@ class TwitterAPIScraper:
                 TwitterPublicAPIncompleteTweetIndexError,
                 TwitterPublicAPIncompleteUserIndexError,
                 TwitterPublicAPIHiccupError,  # TODO: I might want to drop this at some point
+                urllib3.exceptions.EmptyPoolError,
             ],
             epilog=epilog_builder,
         )
@@ -522,13 +812,17 @@ class TwitterAPIScraper:
     #     self.cookie = None
 
     @rate_limited_method()
-    def request(self, url, headers=None, method="GET"):
+    def request(self, url, headers=None, method="GET", cancel_event=None):
         return request(
             url,
             pool_manager=self.pool_manager,
             spoof_ua=True,
             method=method,
             headers=headers,
+            cancel_event=cancel_event,
+            # NOTE: JSON payloads are highly compressible
+            compressed=True,
+            pool_timeout=SHARED_POOL_TIMEOUT,
         )
 
     # def acquire_guest_token(self):
@@ -565,37 +859,23 @@ class TwitterAPIScraper:
     #     )
 
     # @ensure_guest_token
-    def api_call(self, url):
-        headers = {
-            "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
-            # "X-Guest-Token": self.guest_token,
-            "Cookie": self.cookie,
-            "Accept-Language": "en-US,en;q=0.5",
-            "X-Csrf-Token": self.csrf_token,
-            "X-Twitter-Active-User": "yes",
-            "X-Twitter-Auth-Type": "OAuth2Session",
-            "X-Twitter-Client-Language": "en",
-        }
-
-        response = self.request(url, headers=headers)
+    def api_call(self, url, cancel_event=None):
+        response = self.request(
+            url, headers=self.api_headers, cancel_event=cancel_event
+        )
 
         if response.status == 429:
             # self.reset()
-            raise TwitterPublicAPIRateLimitError
+            raise TwitterPublicAPIRateLimitError(retry_after=get_retry_after(response))
 
         if response.status in [401, 403]:
             # self.reset()
             raise TwitterPublicAPIBadAuthError(response.status)
 
-        try:
-            data = response.json()
-        except JSONDecodeError:
-            raise TwitterPublicAPIInvalidResponseError(
-                status=response.status, response_text=response.text
-            )
+        data = parse_json_response(response)
 
         if response.status >= 400:
-            error = getpath(data, ["errors", 0])
+            error = walk_path(data, ("errors", 0))
 
             if error is not None and response.status == 400 and error.get("code") == 47:
                 raise TwitterPublicAPIBadRequest
@@ -610,33 +890,41 @@ class TwitterAPIScraper:
         return data
 
     @retrying_method()
-    def request_tweet_search(self, query, locale, cursor=None, refs=None, dump=False):
-        query = quote(json.dumps(query, ensure_ascii=False))
-
-        # TODO: refactor lol
-        url = "https://twitter.com/i/api/graphql/L1VfBERtzc3VkBBT0YAYHA/SearchTimeline?variables=%7B%22rawQuery%22%3A{}%2C%22count%22%3A20%2C%22querySource%22%3A%22typed_query%22%2C%22product%22%3A%22Latest%22%7D&features=%7B%22rweb_lists_timeline_redesign_enabled%22%3Atrue%2C%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D&fieldToggles=%7B%22withArticleRichContentState%22%3Afalse%7D".format(
-            query
-        )
-
-        if cursor is not None:
-            url = "https://twitter.com/i/api/graphql/L1VfBERtzc3VkBBT0YAYHA/SearchTimeline?variables=%7B%22rawQuery%22%3A{}%2C%22count%22%3A20%2C%22cursor%22%3A%22{}%22%2C%22querySource%22%3A%22typed_query%22%2C%22product%22%3A%22Latest%22%7D&features=%7B%22rweb_lists_timeline_redesign_enabled%22%3Atrue%2C%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D&fieldToggles=%7B%22withArticleRichContentState%22%3Afalse%7D".format(
-                query, quote(cursor)
-            )
+    def request_tweet_search_page(
+        self, query, cursor=None, dump=False, cancel_event=None
+    ):
+        url = forge_tweet_search_url(query, cursor)
 
         # NOTE: old method
         # params = forge_search_params(query, cursor=cursor, target="tweets")
         # url = "%s?%s" % (TWITTER_PUBLIC_SEARCH_ENDPOINT, params)
 
-        data = self.api_call(url)
+        data = self.api_call(url, cancel_event=cancel_event)
 
-        next_cursor = extract_cursor_from_tweets_payload(data)
+        if dump:
+            return data
 
-        tweets = []
+        # NOTE: recombobulating tweets is kept within the retry scope because
+        # incomplete payloads are fixed by fetching them again
+        return extract_cursor_from_tweets_payload(data), list(tweets_payload_iter(data))
+
+    def request_tweet_search(
+        self, query, locale, cursor=None, refs=None, dump=False, cancel_event=None
+    ):
+        # NOTE: only the network-bound part is retried, so that normalization
+        # work is not wasted and refs are not mutated by a failed attempt
+        page = self.request_tweet_search_page(
+            query, cursor, dump=dump, cancel_event=cancel_event
+        )
 
         if dump:
-            return data
+            return page
+
+        next_cursor, payload_tweets = page
+
+        tweets = []
 
-        for tweet, meta in tweets_payload_iter(data):
+        for tweet, meta in payload_tweets:
             try:
                 result = normalize_tweet(
                     tweet,
@@ -701,14 +989,7 @@ class TwitterAPIScraper:
 
     @retrying_method()
     def request_followers_you_know(self, user_id, cursor=None):
-        url = "https://twitter.com/i/api/graphql/sT_K0qB2bqpWfL3-cq4zaQ/FollowersYouKnow?variables=%7B%22userId%22%3A%22{}%22%2C%22count%22%3A20%2C%22includePromotedContent%22%3Afalse%7D&features=%7B%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22c9s_tweet_anatomy_moderator_badge_enabled%22%3Atrue%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22rweb_video_timestamps_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D".format(
-            quote(user_id)
-        )
-
-        if cursor is not None:
-            url = "https://twitter.com/i/api/graphql/sT_K0qB2bqpWfL3-cq4zaQ/FollowersYouKnow?variables=%7B%22userId%22%3A%22{}%22%2C%22count%22%3A20%2C%22cursor%22%3A%22{}%22%2C%22includePromotedContent%22%3Afalse%7D&features=%7B%22responsive_web_graphql_exclude_directive_enabled%22%3Atrue%2C%22verified_phone_label_enabled%22%3Afalse%2C%22creator_subscriptions_tweet_preview_api_enabled%22%3Atrue%2C%22responsive_web_graphql_timeline_navigation_enabled%22%3Atrue%2C%22responsive_web_graphql_skip_user_profile_image_extensions_enabled%22%3Afalse%2C%22c9s_tweet_anatomy_moderator_badge_enabled%22%3Atrue%2C%22tweetypie_unmention_optimization_enabled%22%3Atrue%2C%22responsive_web_edit_tweet_api_enabled%22%3Atrue%2C%22graphql_is_translatable_rweb_tweet_is_translatable_enabled%22%3Atrue%2C%22view_counts_everywhere_api_enabled%22%3Atrue%2C%22longform_notetweets_consumption_enabled%22%3Atrue%2C%22responsive_web_twitter_article_tweet_consumption_enabled%22%3Afalse%2C%22tweet_awards_web_tipping_enabled%22%3Afalse%2C%22freedom_of_speech_not_reach_fetch_enabled%22%3Atrue%2C%22standardized_nudges_misinfo%22%3Atrue%2C%22tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled%22%3Atrue%2C%22rweb_video_timestamps_enabled%22%3Atrue%2C%22longform_notetweets_rich_text_read_enabled%22%3Atrue%2C%22longform_notetweets_inline_media_enabled%22%3Atrue%2C%22responsive_web_media_download_video_enabled%22%3Afalse%2C%22responsive_web_enhance_cards_enabled%22%3Afalse%7D".format(
-                quote(user_id), quote(cursor)
-            )
+        url = forge_followers_you_know_url(user_id, cursor)
 
         data = self.api_call(url)
 
@@ -740,33 +1021,59 @@ class TwitterAPIScraper:
 
         refs = set() if include_referenced_tweets else None
 
-        while True:
-            new_cursor, tweets = self.request_tweet_search(
-                query, locale, cursor, refs=refs
-            )
+        page = PrefetchedCall(self.request_tweet_search, query, locale, refs=refs)
+        next_page = None
 
-            if not tweets:
-                return
+        # NOTE: the next page is fetched while the current one is being
+        # consumed, unless we already know we won't need it. If the consumer
+        # stops early, e.g. by closing the generator, the pending prefetch is
+        # cancelled and gives up before sending its request, unless it was
+        # already sent, in which case its result is simply discarded.
+        try:
+            while True:
+                new_cursor, tweets = page.result()
+                next_page = None
 
-            for tweet, meta in tweets:
-                if with_meta:
-                    yield tweet, meta
+                if not tweets:
+                    return
 
-                else:
-                    yield tweet
+                # NOTE: we cannot stop when no tweets are found anymore because
+                # of Twitter's public facing API's strange hiccups.
+                # Comparing cursors seems to be the only good option now...
+                if (
+                    new_cursor is not None
+                    and new_cursor != cursor
+                    and (limit is None or i + len(tweets) < limit)
+                ):
+                    next_page = PrefetchedCall(
+                        self.request_tweet_search,
+                        query,
+                        locale,
+                        new_cursor,
+                        refs=refs,
+                    )
+
+                for tweet, meta in tweets:
+                    if with_meta:
+                        yield tweet, meta
 
-                i += 1
+                    else:
+                        yield tweet
 
-                if limit is not None and i >= limit:
+                    i += 1
+
+                    if limit is not None and i >= limit:
+                        return
+
+                if next_page is None:
                     return
 
-            # NOTE: we cannot stop when no tweets are found anymore because
-            # of Twitter's public facing API's strange hiccups.
-            # Comparing cursors seems to be the only good option now...
-            if new_cursor is None or new_cursor == cursor:
-                return
+                cursor = new_cursor
+                page = next_page
 
-            cursor = new_cursor
+        finally:
+            if next_page is not None:
+                next_page.cancel()
 
     def search_users(self, query, locale=None, limit=None):
         if is_query_too_long(query):
@@ -813,14 +1120,19 @@ class TwitterAPIScraper:
 
 
 class TwitterGuestAPIScraper:
+    # NOTE: guest tokens are valid for hours and are not tied to a given
+    # client, so they are shared by every scraper of the process instead
+    # of costing an additional round-trip per instance
+    shared_guest_token: Optional[GuestToken] = None
+    shared_guest_token_lock = Lock()
+
     def __init__(self):
-        self.pool_manager = create_pool_manager(
-            timeout=TWITTER_PUBLIC_API_DEFAULT_TIMEOUT, spoof_tls_ciphers=True
-        )
+        self.pool_manager = get_shared_pool_manager()
 
         # NOTE: 1 call per 2 second
         self.rate_limiter_state = RateLimiterState(1, 2)
 
+        self.shared_token: Optional[GuestToken] = None
         self.reset()
 
         def epilog_builder(retry_state: RetryCallState):
@@ -833,6 +1145,9 @@ class TwitterGuestAPIScraper:
 
         self.retryer = create_request_retryer(
             min=1,
+            max_attempts=MAXIMUM_RETRY_ATTEMPTS,
+            max_delay=MAXIMUM_RETRY_DELAY,
+            wait=twitter_api_retryer_wait(min=1),
             additional_exceptions=[
                 TwitterPublicAPIRateLimitError,
                 TwitterPublicAPIInvalidResponseError,
@@ -840,88 +1155,132 @@ class TwitterGuestAPIScraper:
                 TwitterPublicAPIncompleteTweetIndexError,
                 TwitterPublicAPIncompleteUserIndexError,
                 TwitterPublicAPIHiccupError,  # TODO: I might want to drop this at some point
+                urllib3.exceptions.EmptyPoolError,
             ],
             epilog=epilog_builder,
         )
 
     def reset(self):
+        with TwitterGuestAPIScraper.shared_guest_token_lock:
+            shared = TwitterGuestAPIScraper.shared_guest_token
+
+            if shared is not None and shared is self.shared_token:
+                TwitterGuestAPIScraper.shared_guest_token = None
+
+        self.shared_token = None
         self.guest_token = None
-        self.guest_token_use_count = 0
         self.cookie = None
+        self.api_headers = None
+
+    def set_guest_token(self, token: GuestToken) -> None:
+        guest_token = token.token
+        cookie = token.cookie
+
+        self.shared_token = token
+        self.guest_token = guest_token
+        self.cookie = cookie
+
+        # NOTE: headers are built once per guest token rather than per call
+        self.api_headers = {
+            "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
+            "X-Guest-Token": guest_token,
+            "Cookie": cookie,
+            "Accept-Language": "en-US,en;q=0.5",
+            "Connection": "keep-alive",
+            "X-Twitter-Active-User": "yes",
+            "X-Twitter-Client-Language": "en",
+        }
 
     @rate_limited_method()
-    def request(self, url, headers=None, method="GET"):
+    def request(self, url, headers=None, method="GET", cancel_event=None):
         return request(
             url,
             pool_manager=self.pool_manager,
             spoof_ua=True,
             method=method,
             headers=headers,
+            cancel_event=cancel_event,
+            # NOTE: JSON payloads are highly compressible
+            compressed=True,
+            pool_timeout=SHARED_POOL_TIMEOUT,
         )
 
+    def use_guest_token(self) -> bool:
+        with TwitterGuestAPIScraper.shared_guest_token_lock:
+            shared = TwitterGuestAPIScraper.shared_guest_token
+
+            # NOTE: the token may have been rotated by another scraper
+            if shared is None or shared is not self.shared_token:
+                return False
+
+            if not shared.is_usable():
+                return False
+
+            shared.use_count += 1
+
+            return True
+
     def acquire_guest_token(self):
-        headers = {
-            "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
-            "Accept-Language": "en-US,en;q=0.5",
-        }
+        # NOTE: concurrent scrapers wait for the one acquiring a token instead
+        # of all hitting the activation endpoint at once
+        with TwitterGuestAPIScraper.shared_guest_token_lock:
+            shared = TwitterGuestAPIScraper.shared_guest_token
+
+            if shared is not None and shared.is_usable():
+                shared.use_count += 1
+                self.set_guest_token(shared)
+                return
 
-        response = self.request(TWITTER_GUEST_ACTIVATE_ENDPOINT, headers, method="POST")
+            headers = {
+                "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
+                "Accept-Language": "en-US,en;q=0.5",
+            }
 
-        if response.status >= 400:
-            raise TwitterPublicAPIInvalidResponseError(
-                status=response.status, response_text=response.text
+            response = self.request(
+                TWITTER_GUEST_ACTIVATE_ENDPOINT, headers, method="POST"
             )
 
-        try:
-            api_token_response = response.json()
-        except JSONDecodeError:
-            raise TwitterPublicAPIInvalidResponseError(
-                status=response.status, response_text=response.text
+            if response.status >= 400:
+                raise TwitterPublicAPIInvalidResponseError(
+                    status=response.status, response_text=response.text
+                )
+
+            api_token_response = parse_json_response(response)
+
+            guest_token = api_token_response.get("guest_token")
+
+            if guest_token is None:
+                raise TwitterPublicAPIGuestTokenError
+
+            cookie = response.headers[
+                "Set-Cookie"
+            ] + ", gt=%s; Domain=.twitter.com; Path=/; Secure ; Expires=%s" % (
+                guest_token,
+                create_cookie_expiration(),
             )
 
-        guest_token = api_token_response.get("guest_token")
+            shared = GuestToken(guest_token, cookie, time.time(), use_count=1)
 
-        if guest_token is None:
-            raise TwitterPublicAPIGuestTokenError
+            self.set_guest_token(shared)
 
-        self.guest_token = guest_token
-        self.cookie = response.headers[
-            "Set-Cookie"
-        ] + ", gt=%s; Domain=.twitter.com; Path=/; Secure ; Expires=%s" % (
-            guest_token,
-            create_cookie_expiration(),
-        )
+            TwitterGuestAPIScraper.shared_guest_token = shared
 
     @ensure_guest_token
     def api_call(self, url):
-        headers = {
-            "Authorization": TWITTER_PUBLIC_API_AUTH_HEADER,
-            "X-Guest-Token": self.guest_token,
-            "Cookie": self.cookie,
-            "Accept-Language": "en-US,en;q=0.5",
-            "X-Twitter-Active-User": "yes",
-            "X-Twitter-Client-Language": "en",
-        }
-
-        response = self.request(url, headers=headers)
+        response = self.request(url, headers=self.api_headers)
 
         if response.status == 429:
             self.reset()
-            raise TwitterPublicAPIRateLimitError
+            raise TwitterPublicAPIRateLimitError(retry_after=get_retry_after(response))
 
         if response.status in [401, 403]:
             self.reset()
             raise TwitterPublicAPIBadAuthError(response.status)
 
-        try:
-            data = response.json()
-        except JSONDecodeError:
-            raise TwitterPublicAPIInvalidResponseError(
-                status=response.status, response_text=response.text
-            )
+        data = parse_json_response(response)
 
         if response.status >= 400:
-            error = getpath(data, ["errors", 0])
+            error = walk_path(data, ("errors", 0))
 
             if error is not None and response.status == 400 and error.get("code") == 47:
                 raise TwitterPublicAPIBadRequest
@@ -943,7 +1302,7 @@ class TwitterGuestAPIScraper:
 
         data = self.api_call(url)
 
-        tweet_root = getpath(data, ("data", "tweetResult", "result"))
+        tweet_root = walk_path(data, ("data", "tweetResult", "result"))
 
         if tweet_root is None:
             raise TwitterPublicAPINotFound(tweet_id)
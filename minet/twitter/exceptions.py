@@ -2,6 +2,8 @@
 # Minet Twitter Exceptions
 # =============================================================================
 #
+from typing import Optional
+
 from minet.exceptions import MinetError
 
 
@@ -26,7 +28,15 @@ class TwitterPublicAPIQueryTooLongError(TwitterPublicAPIError):
 
 
 class TwitterPublicAPIRateLimitError(TwitterPublicAPIError):
-    pass
+    def __init__(self, message=None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def format_epilog(self):
+        if self.retry_after is None:
+            return ""
+
+        return "Retry after: %is" % self.retry_after
 
 
 class TwitterPublicAPIBadAuthError(TwitterPublicAPIError):
@@ -47,6 +47,7 @@ from tenacity import (
     RetryCallState,
     retry_if_exception,
     stop_after_attempt,
+    stop_after_delay,
     stop_when_event_set,
     sleep_using_event,
 )
@@ -393,6 +394,7 @@ def atomic_request(
     body=None,
     cancel_event: Optional[Event] = None,
     final_time: Optional[float] = None,
+    pool_timeout: Optional[float] = None,
 ) -> BufferedResponse:
     """
     Generic request helpers using a urllib3 pool_manager to access some resource.
@@ -422,6 +424,11 @@ def atomic_request(
     if timeout is not None:
         request_kwargs["timeout"] = timeout
 
+    # NOTE: only relevant for blocking pools, where we would otherwise wait
+    # forever for a free connection
+    if pool_timeout is not None:
+        request_kwargs["pool_timeout"] = pool_timeout
+
     if final_time is None:
         final_time = pool_manager_aware_timeout_to_final_time(pool_manager, timeout)
 
@@ -448,6 +455,7 @@ def atomic_resolve(
     body=None,
     canonicalize: bool = False,
     stateful: bool = False,
+    pool_timeout: Optional[float] = None,
 ) -> Tuple[RedirectionStack, BufferedResponse]:
     """
     Helper function attempting to resolve the given url.
@@ -511,6 +519,7 @@ def atomic_resolve(
                 timeout=timeout,
                 final_time=final_time,
                 cancel_event=cancel_event,
+                pool_timeout=pool_timeout,
             )
 
             redirection.status = buffered_response.status
@@ -987,6 +996,7 @@ def request(
     stateful: bool = False,
     use_pycurl: bool = False,
     compressed: bool = False,
+    pool_timeout: Optional[float] = None,
 ) -> Response:
     # Pycurl and pool manager
     if use_pycurl:
@@ -1058,6 +1068,7 @@ def request(
             body=body,
             timeout=timeout,
             cancel_event=cancel_event,
+            pool_timeout=pool_timeout,
         )
     else:
         stack, buffered_response = atomic_resolve(
@@ -1075,6 +1086,7 @@ def request(
             timeout=timeout,
             cancel_event=cancel_event,
             stateful=stateful,
+            pool_timeout=pool_timeout,
         )
 
     if raise_on_statuses is not None and buffered_response.status in raise_on_statuses:
@@ -1173,6 +1185,25 @@ def request_jsonrpc(
 ONE_DAY = 24 * 60 * 60
 
 
+class DelegatedThread(threading.Thread):
+    """
+    Thread doing some work on behalf of the thread starting it, e.g. to
+    prefetch something. Retries happening in such a thread are logged as if
+    they happened in the thread it works for.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.caller = threading.current_thread()
+
+
+def resolve_delegating_thread(thread: threading.Thread) -> threading.Thread:
+    while isinstance(thread, DelegatedThread):
+        thread = thread.caller
+
+    return thread
+
+
 class log_request_retryer_before_sleep:
     def __init__(
         self, epilog_builder: Optional[Callable[[RetryCallState], Optional[str]]] = None
@@ -1192,12 +1223,13 @@ class log_request_retryer_before_sleep:
 
         assert retry_state.next_action is not None
 
+        current_thread = resolve_delegating_thread(threading.current_thread())
+
         sleepers_logger.warn(
             "request_retryer starts sleeping",
             extra={
                 "source": "request_retryer",
-                "from_thread": threading.current_thread()
-                is not threading.main_thread(),
+                "from_thread": current_thread is not threading.main_thread(),
                 "retry_state": retry_state,
                 "exception": exception,
                 "sleep_time": retry_state.next_action.sleep,
@@ -1228,10 +1260,35 @@ class request_retryer_custom_exponential_backoff(wait_base):
         return max(0, min(result, self.max))
 
 
+class request_retryer_decorrelated_jitter_backoff(wait_base):
+    def __init__(self, min: float = 10, max: float = ONE_DAY, multiplier=3) -> None:
+        self.min = min
+        self.max = max
+        self.multiplier = multiplier
+
+    def next_sleep(self, retry_state: RetryCallState, at_least: float = 0) -> float:
+        # NOTE: each sleep is drawn from the previous one instead of the
+        # attempt number, so that concurrent retryers quickly drift apart.
+        # The previous sleep is kept on the retry state so that the same
+        # wait can safely be shared by several retried calls.
+        last_sleep = getattr(retry_state, "decorrelated_jitter_last_sleep", self.min)
+
+        result = random.uniform(self.min, min(self.max, last_sleep * self.multiplier))
+        result = max(0, at_least, result)
+
+        setattr(retry_state, "decorrelated_jitter_last_sleep", result)
+
+        return result
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        return self.next_sleep(retry_state)
+
+
 def create_request_retryer(
     min: float = 10,
     max: float = ONE_DAY,
     max_attempts: int = 9,
+    max_delay: Optional[float] = None,
     before_sleep=noop,
     additional_exceptions=None,
     retry_on_timeout: bool = True,
@@ -1239,6 +1296,7 @@ def create_request_retryer(
     predicate: Optional[Callable[[BaseException], bool]] = None,
     epilog: Optional[Callable[[RetryCallState], Optional[str]]] = None,
     cancel_event: Optional[Event] = None,
+    wait: Optional[wait_base] = None,
 ) -> Retrying:
     # By default we only retry network issues, such as Internet being cut off etc.
     retryable_exception_types = [
@@ -1305,7 +1363,9 @@ def create_request_retryer(
 
     retrying_kwargs = {
         "reraise": True,
-        "wait": request_retryer_custom_exponential_backoff(min=min, max=max),
+        "wait": wait
+        if wait is not None
+        else request_retryer_custom_exponential_backoff(min=min, max=max),
         "retry": retry_condition,
         "stop": stop_after_attempt(max_attempts),
         "before_sleep": rcompose(
@@ -1314,6 +1374,10 @@ def create_request_retryer(
         ),
     }
 
+    # Capping total elapsed time?
+    if max_delay is not None:
+        retrying_kwargs["stop"] |= stop_after_delay(max_delay)
+
     # Cancellable sleep?
     if cancel_event is not None:
         if cancel_event.is_set():
@@ -51,6 +51,7 @@ setup(
     ],
     extras_require={
         ":python_version<'3.11'": ["typing_extensions>=4.3"],
+        "orjson": ["orjson>=3,<4"],
     },
     entry_points={"console_scripts": ["minet=minet.cli.__main__:main"]},
     zip_safe=True,
@@ -0,0 +1,45 @@
+# =============================================================================
+# Minet CLI Utils Unit Tests
+# =============================================================================
+import os
+import casanova
+from io import StringIO
+from types import SimpleNamespace
+
+from minet.cli.utils import create_fetch_like_report_iterator
+
+
+def report_paths(input_dir, paths):
+    cli_args = SimpleNamespace(
+        input_dir=input_dir,
+        encoding=None,
+        glob=False,
+        column="path",
+        error_column="error",
+        status_column="status",
+        encoding_column="encoding",
+        mimetype_column="mimetype",
+        body_column="body",
+    )
+
+    reader = casanova.reader(StringIO("path\n" + "\n".join(paths) + "\n"))
+
+    return [item.path for item in create_fetch_like_report_iterator(cli_args, reader)]
+
+
+class TestCLIUtils(object):
+    def test_create_fetch_like_report_iterator_paths(self):
+        absolute = os.path.abspath(os.path.join("somewhere", "file.html"))
+
+        assert report_paths("downloaded", ["a.html", "sub/b.html", absolute]) == [
+            os.path.join("downloaded", "a.html"),
+            os.path.join("downloaded", "sub/b.html"),
+            absolute,
+        ]
+
+        assert report_paths("downloaded" + os.sep, ["a.html", absolute]) == [
+            os.path.join("downloaded", "a.html"),
+            absolute,
+        ]
+
+        assert report_paths(None, ["a.html", absolute]) == ["a.html", absolute]
@@ -2,6 +2,7 @@
 # Minet FS Unit Tests
 # =============================================================================
 import os
+import gzip
 import pytest
 from casanova import Headers, RowWrapper
 
@@ -14,6 +15,7 @@ from minet.fs import (
     NormalizedHostnameFolderStrategy,
     FilenameBuilder,
     ThreadSafeFileWriter,
+    read_potentially_gzipped_path,
 )
 from minet.exceptions import FilenameFormattingError
 
@@ -212,3 +214,42 @@ class TestFS(object):
         assert (
             writer.resolve("test/../test.html", relative=True) == "downloaded/test.html"
         )
+
+    def test_read_potentially_gzipped_path(self, tmp_path):
+        html = "<html><body>Café</body></html>"
+
+        path = str(tmp_path / "test.html")
+        gzipped_path = str(tmp_path / "test.html.gz")
+
+        with open(path, "wb") as f:
+            f.write(html.encode("latin-1"))
+
+        with gzip.open(gzipped_path, "wb") as f:
+            f.write(html.encode("utf-8"))
+
+        assert read_potentially_gzipped_path(path, encoding="latin-1") == html
+        assert read_potentially_gzipped_path(gzipped_path, encoding="utf-8") == html
+        assert read_potentially_gzipped_path(gzipped_path) == html
+
+        crlf_path = str(tmp_path / "crlf.html")
+        crlf_gzipped_path = str(tmp_path / "crlf.html.gz")
+
+        crlf_html = "<html>\r\n<body>\rCafé</body>\r\n</html>"
+
+        with open(crlf_path, "wb") as f:
+            f.write(crlf_html.encode("utf-8"))
+
+        with gzip.open(crlf_gzipped_path, "wb") as f:
+            f.write(crlf_html.encode("utf-8"))
+
+        # NOTE: known encodings translate newlines, as text mode would
+        expected = "<html>\n<body>\nCafé</body>\n</html>"
+
+        assert read_potentially_gzipped_path(crlf_path, encoding="utf-8") == expected
+        assert (
+            read_potentially_gzipped_path(crlf_gzipped_path, encoding="utf-8")
+            == expected
+        )
+
+        # NOTE: inferred encodings always returned the raw text
+        assert read_potentially_gzipped_path(crlf_path) == crlf_html
@@ -0,0 +1,174 @@
+# =============================================================================
+# Minet Hyphe Unit Tests
+# =============================================================================
+from ural import links_from_html
+
+import minet.hyphe.spider as hyphe_spider
+from minet.hyphe.spider import HypheSpider, extract_links
+
+PREFIXES = [
+    ("http://lemonde.fr", "lemonde"),
+    ("http://www.lemonde.fr", "lemonde-www"),
+    ("https://lemonde.fr", "lemonde-https"),
+    ("https://lemonde.fr:8080", "lemonde-8080"),
+    ("http://sub.lemonde.fr", "sub"),
+    ("http://lefigaro.fr/actualites", "lefigaro-actualites"),
+]
+
+URLS = [
+    "http://lemonde.fr",
+    "http://lemonde.fr/",
+    "http://lemonde.fr/politique",
+    "http://lemonde.fr/politique/article.html",
+    "http://lemonde.fr/sport/article.html?id=3",
+    "http://www.lemonde.fr/politique/article.html",
+    "http://WWW.lemonde.fr/sport",
+    "https://lemonde.fr/politique",
+    "https://www.lemonde.fr/politique",
+    "https://lemonde.fr:8080/politique",
+    "https://lemonde.fr:8081/politique",
+    "http://lemonde.fr:80/politique",
+    "http://sub.lemonde.fr/politique",
+    "http://deep.sub.lemonde.fr/politique",
+    "http://other.lemonde.fr/politique",
+    "http://lefigaro.fr",
+    "http://lefigaro.fr/actualites",
+    "http://lefigaro.fr/actualites/article.html",
+    "http://lefigaro.fr/sport",
+    "http://liberation.fr/politique",
+]
+
+
+HTML = """
+<html>
+    <body>
+        <a href="/politique">Relative to root</a>
+        <a href="article.html">Relative</a>
+        <a href="../sport/article.html?id=3#comments">Relative with dots</a>
+        <a href="//www.lemonde.fr/sport">Protocol-relative</a>
+        <a href="#top">Fragment only</a>
+        <a href="">Empty</a>
+        <a href="   ">Whitespace</a>
+        <a href="javascript:void(0)">Javascript</a>
+        <a href="JavaScript:alert(1)">Javascript with case</a>
+        <a href="mailto:someone@lemonde.fr">Mailto</a>
+        <a href="tel:+33600000000">Tel</a>
+        <a href="ftp://lemonde.fr/file.txt">Ftp</a>
+        <a href="HTTPS://LeMonde.fr/Culture/">Uppercase</a>
+        <a href="http://lemonde.fr/politique/">Absolute</a>
+        <a href="http://lemonde.fr/politique/">Absolute duplicate</a>
+        <a href="/politique">Relative to root duplicate</a>
+        <a href="http://lemonde.fr/international/article.html#section">Fragment</a>
+        <a href="http://lemonde.fr/international/article.html#other">Other fragment</a>
+        <a href="http://[broken">Malformed</a>
+        <a href="http://">No host</a>
+        <a href="http://localhost/test">No tld</a>
+        <a href="https://lefigaro.fr/actualites?utm_source=lemonde">Tracked</a>
+        <a href="  /with/spaces article.html  ">Spaces</a>
+        <a href="http://lemonde.fr/politique/article.html">Self</a>
+        <a href="?page=2">Query only</a>
+        <a href="%E2%82%AC/euro">Percent-encoded</a>
+        <a href="/café">Non ascii</a>
+    </body>
+</html>
+"""
+
+
+def create_spider(prefixes=PREFIXES):
+    spider = HypheSpider()
+
+    for prefix, webentity in prefixes:
+        spider.set(prefix, webentity)
+
+    return spider
+
+
+def assert_same_matches(spider, cache=None):
+    # NOTE: going through the urls twice to hit the cache
+    for url in URLS + URLS:
+        assert spider.match_with_cache(url, cache) == spider.trie.match(url), url
+
+
+class TestHypheSpider(object):
+    def test_extract_links(self):
+        url = "http://lemonde.fr/politique/article.html"
+        body = HTML.encode("utf-8")
+
+        expected = list(
+            links_from_html(
+                url,
+                body,
+                encoding="utf-8",
+                canonicalize=True,
+                unique=True,
+                strip_fragment=True,
+            )
+        )
+
+        assert extract_links(url, body, "utf-8") == expected
+        assert len(expected) > 5
+
+    def test_match_with_cache(self):
+        spider = create_spider()
+        cache = {}
+
+        assert_same_matches(spider, cache)
+        assert spider.match_with_cache("http://lemonde.fr/politique", cache).id == (
+            "lemonde"
+        )
+
+        # Deeper prefixes added after some lookups were cached
+        spider.set("http://lemonde.fr/politique", "lemonde-politique")
+        spider.set("http://www.lemonde.fr/sport", "lemonde-www-sport")
+        spider.set("https://lemonde.fr:8080/politique", "lemonde-8080-politique")
+        spider.set("http://other.lemonde.fr", "other")
+
+        assert_same_matches(spider, cache)
+
+        assert (
+            spider.match_with_cache(
+                "http://lemonde.fr/politique/article.html", cache
+            ).id
+            == "lemonde-politique"
+        )
+        assert (
+            spider.match_with_cache("http://lemonde.fr/sport/article.html", cache).id
+            == "lemonde"
+        )
+        assert (
+            spider.match_with_cache("http://www.lemonde.fr/sport", cache).id
+            == "lemonde-www-sport"
+        )
+        assert (
+            spider.match_with_cache("https://lemonde.fr:8080/politique", cache).id
+            == "lemonde-8080-politique"
+        )
+        assert (
+            spider.match_with_cache("http://other.lemonde.fr/politique", cache).id
+            == "other"
+        )
+
+        # A fresh cache must agree with the stale one
+        assert_same_matches(spider, {})
+
+    def test_origin_match_cache(self, monkeypatch):
+        spider = create_spider()
+
+        assert_same_matches(spider)
+        assert spider.origin_match_cache
+
+        # The spider's own cache is kept across lookups, and invalidated
+        # when prefixes change
+        spider.set("http://lemonde.fr/politique", "lemonde-politique")
+
+        assert (
+            spider.match_with_cache("http://lemonde.fr/politique/article.html").id
+            == "lemonde-politique"
+        )
+        assert_same_matches(spider)
+
+        monkeypatch.setattr(hyphe_spider, "ORIGIN_MATCH_CACHE_MAX_SIZE", 2)
+        spider.origin_match_cache.clear()
+
+        assert_same_matches(spider)
+        assert len(spider.origin_match_cache) <= 2
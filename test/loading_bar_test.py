@@ -0,0 +1,29 @@
+# =============================================================================
+# Minet Loading Bar Unit Tests
+# =============================================================================
+from minet.cli.loading_bar import LoadingBar
+
+
+class TestLoadingBar(object):
+    def test_print(self):
+        with LoadingBar("Test", total=1) as loading_bar:
+            loading_bar.print("Hello", "world")
+
+    def test_advances_and_stats(self):
+        with LoadingBar("Test", total=10, nested=True) as loading_bar:
+            for i in range(10):
+                with loading_bar.step():
+                    loading_bar.nested_advance(2)
+                    loading_bar.inc_stat("seen")
+
+                    if i % 2 == 0:
+                        loading_bar.inc_stat("even", style="info")
+
+            loading_bar.set_stat("seen", 100)
+
+        assert loading_bar.progress.tasks[0].completed == 10
+        assert loading_bar.sub_total_sum == 20
+        assert loading_bar.stats == {
+            "seen": {"name": "seen", "count": 100, "style": ""},
+            "even": {"name": "even", "count": 5, "style": "info"},
+        }
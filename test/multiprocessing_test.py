@@ -1,7 +1,11 @@
 # =============================================================================
 # Minet Multiprocessing Unit Tests
 # =============================================================================
-from minet.multiprocessing import half_cpus
+from minet.multiprocessing import half_cpus, infer_chunksize, LazyPool
+
+
+def double(n):
+    return n * 2
 
 
 class TestMultiprocessing(object):
@@ -12,3 +16,17 @@ class TestMultiprocessing(object):
         assert half_cpus(3) == 2
         assert half_cpus(2) == 1
         assert half_cpus(1) == 1
+
+    def test_infer_chunksize(self):
+        assert infer_chunksize(None, 4) == 39
+        assert infer_chunksize(10, 4) == 1
+        assert infer_chunksize(1_000_000, 8) == 64
+
+    def test_lazy_pool_max_pending(self):
+        for processes in (1, 2):
+            with LazyPool(processes) as pool:
+                results = list(
+                    pool.imap(double, range(100), chunksize=3, max_pending=2)
+                )
+
+            assert results == [n * 2 for n in range(100)]
@@ -15,6 +15,7 @@ from minet.scrape.analysis import (
     ScraperAnalysis,
 )
 from minet.scrape.interpreter import tabulate
+from minet.scrape.compiler import compile_scraper
 from minet.scrape.std import get_display_text
 from minet.scrape.straining import strainer_from_css
 from minet.scrape.exceptions import (
@@ -266,6 +267,18 @@ class TestDefinitionScraper:
 
         assert result == ["no-class", "no-class"]
 
+    def test_compilation(self):
+        definition = {"iterator": "li", "fields": {"id": "id", "text": "text"}}
+
+        fn = compile_scraper(definition)
+
+        assert fn(BeautifulSoup(BASIC_HTML, "html.parser")) == [
+            {"id": "li1", "text": "One"},
+            {"id": "li2", "text": "Two"},
+        ]
+
+        assert compile_scraper(dict(definition)) is fn
+
     def test_stripped_extraction(self):
         text = scrape({"sel": "div"}, "<div>    Hello world        </div>")
 
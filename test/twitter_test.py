@@ -0,0 +1,393 @@
+# =============================================================================
+# Minet Twitter Unit Tests
+# =============================================================================
+import json
+import time
+from email.utils import formatdate
+from itertools import islice
+from threading import Condition, Event, current_thread, main_thread
+
+import pytest
+
+import minet.twitter.api_scraper as api_scraper
+from minet.exceptions import CancelledRequestError
+from minet.twitter.api_scraper import (
+    PrefetchedCall,
+    TwitterAPIScraper,
+    TwitterGuestAPIScraper,
+    get_retry_after,
+    parse_json_response,
+    twitter_api_retryer_wait,
+    MAX_GUEST_TOKEN_USE_COUNT,
+    TWITTER_GUEST_ACTIVATE_ENDPOINT,
+    MAXIMUM_RETRY_ATTEMPTS,
+    MAXIMUM_RETRY_DELAY,
+    MAXIMUM_RETRY_SLEEP,
+    RATE_LIMIT_RETRY_MIN,
+)
+from minet.twitter.exceptions import (
+    TwitterPublicAPIRateLimitError,
+    TwitterPublicAPIInvalidResponseError,
+    TwitterPublicAPIOverCapacityError,
+)
+from minet.web import resolve_delegating_thread
+
+PAGES = 3
+TWEETS_PER_PAGE = 5
+FAKE_COOKIE = "guest_id=1; ct0=2; auth_token=3"
+
+# NOTE: only bounds how long a broken test can hang, nothing waits for it
+WAIT_TIMEOUT = 10
+
+
+class FakeSearchTransport(object):
+    """
+    Fake tweet search serving PAGES pages of TWEETS_PER_PAGE tweets.
+
+    When `free_calls` is given, calls beyond this number wait until `release`
+    is called, so that tests decide exactly when a pending prefetch goes on.
+    """
+
+    def __init__(self, free_calls=None):
+        self.free_calls = free_calls
+        self.gate = Event()
+        self.condition = Condition()
+        self.entered = 0
+        self.finished = 0
+        self.sent = []
+
+    def search(self, cursor, cancel_event=None):
+        with self.condition:
+            self.entered += 1
+            call = self.entered
+            self.condition.notify_all()
+
+        try:
+            if self.free_calls is not None and call > self.free_calls:
+                assert self.gate.wait(WAIT_TIMEOUT)
+
+            # NOTE: this is what minet.web.atomic_request does
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledRequestError
+
+            self.sent.append(cursor)
+            page = len(self.sent)
+
+            return (
+                str(page) if page < PAGES else None,
+                [({"id": "%i-%i" % (page, j)}, None) for j in range(TWEETS_PER_PAGE)],
+            )
+        finally:
+            with self.condition:
+                self.finished += 1
+                self.condition.notify_all()
+
+    def release(self):
+        self.gate.set()
+
+    def wait_until(self, predicate):
+        with self.condition:
+            assert self.condition.wait_for(lambda: predicate(self), WAIT_TIMEOUT)
+
+
+class FakeTwitterAPIScraper(TwitterAPIScraper):
+    def __init__(self, transport):
+        super().__init__(FAKE_COOKIE)
+        self.transport = transport
+
+    def request_tweet_search(
+        self, query, locale, cursor=None, refs=None, dump=False, cancel_event=None
+    ):
+        return self.transport.search(cursor, cancel_event=cancel_event)
+
+
+class FakeHeadersResponse(object):
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeBodyResponse(object):
+    def __init__(self, body):
+        self.status = 200
+        self.body = body
+        self.text = body.decode("utf-8", errors="replace")
+
+
+def strict_json_loads(body):
+    # NOTE: mimics orjson, which rejects integers wider than 64 bits
+    return json.loads(body, parse_int=lambda n: strict_int(n, body))
+
+
+def strict_int(n, body):
+    if abs(int(n)) >= 2**64:
+        raise json.JSONDecodeError("Integer exceeds 64-bit range", body.decode(), 0)
+
+    return int(n)
+
+
+class FakeGuestAPIScraper(TwitterGuestAPIScraper):
+    def __init__(self, activations):
+        super().__init__()
+        self.activations = activations
+
+    def request(self, url, headers=None, method="GET", cancel_event=None):
+        if url == TWITTER_GUEST_ACTIVATE_ENDPOINT:
+            self.activations.append(url)
+            payload = {"guest_token": str(len(self.activations))}
+        else:
+            payload = {"guest_token": headers["X-Guest-Token"]}
+
+        response = FakeBodyResponse(json.dumps(payload).encode("utf-8"))
+        response.headers = {"Set-Cookie": "guest_id=1"}
+
+        return response
+
+
+class FakeOutcome(object):
+    def __init__(self, exc):
+        self.exc = exc
+
+    def exception(self):
+        return self.exc
+
+
+class FakeRetryState(object):
+    def __init__(self):
+        self.attempt_number = 0
+        self.seconds_since_start = 0.0
+        self.outcome = None
+
+    def fail(self, exc):
+        self.attempt_number += 1
+        self.outcome = FakeOutcome(exc)
+
+
+def simulate_retries(wait, make_exc):
+    state = FakeRetryState()
+    sleeps = []
+
+    while True:
+        state.fail(make_exc())
+
+        if (
+            state.attempt_number >= MAXIMUM_RETRY_ATTEMPTS
+            or state.seconds_since_start >= MAXIMUM_RETRY_DELAY
+        ):
+            return sleeps
+
+        sleep = wait(state)
+        sleeps.append(sleep)
+        state.seconds_since_start += sleep
+
+
+class TestTwitterAPIScraper(object):
+    def test_search_tweets_prefetching(self):
+        transport = FakeSearchTransport(free_calls=1)
+        scraper = FakeTwitterAPIScraper(transport)
+
+        iterator = scraper.search_tweets("query")
+        next(iterator)
+
+        # Next page is requested while the first one is being consumed
+        transport.wait_until(lambda t: t.entered == 2)
+        transport.release()
+
+        tweets = list(iterator)
+
+        assert len(tweets) == PAGES * TWEETS_PER_PAGE - 1
+        assert transport.sent == [None, "1", "2"]
+
+    def test_search_tweets_early_close(self):
+        transport = FakeSearchTransport(free_calls=1)
+        scraper = FakeTwitterAPIScraper(transport)
+
+        iterator = scraper.search_tweets("query")
+        next(iterator)
+        transport.wait_until(lambda t: t.entered == 2)
+        iterator.close()
+        transport.release()
+        transport.wait_until(lambda t: t.finished == 2)
+
+        assert transport.sent == [None]
+
+        transport = FakeSearchTransport(free_calls=1)
+        scraper = FakeTwitterAPIScraper(transport)
+
+        for tweet in scraper.search_tweets("query"):
+            transport.wait_until(lambda t: t.entered == 2)
+            break
+
+        transport.release()
+        transport.wait_until(lambda t: t.finished == 2)
+
+        assert transport.sent == [None]
+
+        transport = FakeSearchTransport(free_calls=2)
+        scraper = FakeTwitterAPIScraper(transport)
+
+        tweets = list(islice(scraper.search_tweets("query"), TWEETS_PER_PAGE + 1))
+        transport.release()
+        transport.wait_until(lambda t: t.finished == 3)
+
+        assert len(tweets) == TWEETS_PER_PAGE + 1
+        assert transport.sent == [None, "1"]
+
+    def test_search_tweets_limit(self):
+        transport = FakeSearchTransport(free_calls=1)
+        scraper = FakeTwitterAPIScraper(transport)
+
+        tweets = list(scraper.search_tweets("query", limit=TWEETS_PER_PAGE))
+
+        assert len(tweets) == TWEETS_PER_PAGE
+        assert transport.entered == 1
+
+    def test_prefetched_call(self):
+        def call(cancel_event=None):
+            return resolve_delegating_thread(current_thread())
+
+        assert PrefetchedCall(call).result() is main_thread()
+
+        def failing_call(cancel_event=None):
+            raise CancelledRequestError
+
+        with pytest.raises(CancelledRequestError):
+            PrefetchedCall(failing_call).result()
+
+
+class TestTwitterGuestAPIScraper(object):
+    def test_shared_guest_token(self, monkeypatch):
+        monkeypatch.setattr(TwitterGuestAPIScraper, "shared_guest_token", None)
+
+        activations = []
+        scrapers = [FakeGuestAPIScraper(activations) for _ in range(3)]
+
+        for i in range(MAX_GUEST_TOKEN_USE_COUNT):
+            data = scrapers[i % len(scrapers)].api_call("https://api.twitter.com/")
+            assert data == {"guest_token": "1"}
+
+        assert len(activations) == 1
+
+        # Uses are counted across scrapers, so the token is now rotated
+        data = scrapers[0].api_call("https://api.twitter.com/")
+
+        assert data == {"guest_token": "2"}
+        assert len(activations) == 2
+
+        data = scrapers[1].api_call("https://api.twitter.com/")
+
+        assert data == {"guest_token": "2"}
+        assert len(activations) == 2
+
+        scrapers[1].reset()
+        scrapers[2].api_call("https://api.twitter.com/")
+
+        assert len(activations) == 3
+
+
+class TestTwitterPayloads(object):
+    def test_parse_json_response(self, monkeypatch):
+        monkeypatch.setattr(api_scraper, "json_loads", strict_json_loads)
+        monkeypatch.setattr(api_scraper, "ORJSON_SUPPORT", True)
+
+        assert parse_json_response(FakeBodyResponse(b'{"id": 1}')) == {"id": 1}
+        assert parse_json_response(
+            FakeBodyResponse(b'{"id": 36893488147419103232}')
+        ) == {"id": 2**65}
+
+        with pytest.raises(TwitterPublicAPIInvalidResponseError):
+            parse_json_response(FakeBodyResponse(b"<html>"))
+
+        monkeypatch.setattr(api_scraper, "ORJSON_SUPPORT", False)
+
+        with pytest.raises(TwitterPublicAPIInvalidResponseError):
+            parse_json_response(FakeBodyResponse(b'{"id": 36893488147419103232}'))
+
+
+class TestTwitterRetries(object):
+    def test_get_retry_after(self):
+        assert get_retry_after(FakeHeadersResponse({"retry-after": "30"})) == 30
+        assert get_retry_after(FakeHeadersResponse({"retry-after": "-5"})) == 0
+
+        date = formatdate(time.time() + 100, usegmt=True)
+        retry_after = get_retry_after(FakeHeadersResponse({"retry-after": date}))
+        assert retry_after is not None and 95 <= retry_after <= 100
+
+        reset = str(int(time.time()) + 60)
+        retry_after = get_retry_after(
+            FakeHeadersResponse({"x-rate-limit-reset": reset})
+        )
+        assert retry_after is not None and 55 <= retry_after <= 60
+
+        reset = str(int(time.time()) - 60)
+        assert get_retry_after(FakeHeadersResponse({"x-rate-limit-reset": reset})) == 0
+
+        assert get_retry_after(FakeHeadersResponse({"retry-after": "soon"})) is None
+        assert get_retry_after(FakeHeadersResponse({"x-rate-limit-reset": "?"})) is None
+        assert get_retry_after(FakeHeadersResponse({})) is None
+
+    def test_rate_limit_error(self):
+        exc = TwitterPublicAPIRateLimitError(retry_after=12.5)
+
+        assert exc.retry_after == 12.5
+        assert exc.format_epilog() == "Retry after: 12s"
+
+        exc = TwitterPublicAPIRateLimitError()
+
+        assert exc.retry_after is None
+        assert exc.format_epilog() == ""
+
+    def test_wait(self):
+        wait = twitter_api_retryer_wait(min=1)
+
+        # Regular errors keep the exponential backoff and its whole budget
+        sleeps = simulate_retries(wait, TwitterPublicAPIOverCapacityError)
+
+        assert 0.75 <= sleeps[0] <= 1.25
+        assert 3 <= sleeps[1] <= 5
+        assert 12 <= sleeps[2] <= 20
+        assert abs(sum(sleeps) - MAXIMUM_RETRY_DELAY) < 1e-6
+
+        # Invalid responses are retried quickly first
+        sleeps = simulate_retries(wait, TwitterPublicAPIInvalidResponseError)
+
+        assert 0.1875 <= sleeps[0] <= 0.3125
+        assert 0.75 <= sleeps[1] <= 1.25
+        assert sum(sleeps) >= MAXIMUM_RETRY_DELAY * 3 / 4
+
+        # Rate limits without headers use decorrelated jitter
+        for _ in range(50):
+            sleeps = simulate_retries(wait, TwitterPublicAPIRateLimitError)
+
+            assert len(sleeps) == MAXIMUM_RETRY_ATTEMPTS - 1
+            assert RATE_LIMIT_RETRY_MIN <= sleeps[0] <= RATE_LIMIT_RETRY_MIN * 3
+            assert all(
+                RATE_LIMIT_RETRY_MIN <= sleep <= MAXIMUM_RETRY_SLEEP for sleep in sleeps
+            )
+            assert all(b <= a * 3 for a, b in zip(sleeps, sleeps[1:]))
+
+        # Rate limits never wake up before the time given by the API
+        sleeps = simulate_retries(
+            wait, lambda: TwitterPublicAPIRateLimitError(retry_after=120)
+        )
+
+        assert all(120 <= sleep <= MAXIMUM_RETRY_SLEEP for sleep in sleeps)
+
+        sleeps = simulate_retries(
+            wait, lambda: TwitterPublicAPIRateLimitError(retry_after=3600)
+        )
+
+        assert sleeps == [3600] * (MAXIMUM_RETRY_DELAY // 3600)
+
+        # Concurrent workers don't wake up together
+        first_sleeps = []
+
+        for _ in range(20):
+            state = FakeRetryState()
+            state.fail(TwitterPublicAPIRateLimitError(retry_after=5))
+            first_sleeps.append(wait(state))
+
+        assert all(
+            RATE_LIMIT_RETRY_MIN <= sleep <= RATE_LIMIT_RETRY_MIN * 3
+            for sleep in first_sleeps
+        )
+        assert len(set(first_sleeps)) > 1